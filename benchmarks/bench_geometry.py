@@ -0,0 +1,117 @@
+"""Benchmarks of the geometry primitives (Point, Line, Circle)
+
+python benchmarks/bench_geometry.py [repeat]
+
+Run it in two checkouts (for example a git worktree of the previous commit) to
+compare them. Times are the best of the repetitions.
+"""
+
+import os
+import sys
+import tracemalloc
+from time import perf_counter
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from laser_tag.entities.Player import Player
+from laser_tag.game.Game import Game
+from laser_tag.math.Line import Line
+from laser_tag.math.Point import Point
+from laser_tag.math.rotations import rotate
+
+OBJECTS_QUANTITY = 100000
+MOVES_QUANTITY = 100000
+CALLS_QUANTITY = 200000
+RAYS_QUANTITIES = [128, 1920]
+RAYS_CASTS_QUANTITY = 30
+
+
+def best_time(function, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+def bench_memory():
+    tracemalloc.start()
+    points = [Point(i, i) for i in range(OBJECTS_QUANTITY)]
+    lines = [Line(point, point) for point in points]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del points, lines
+    print(
+        f"{OBJECTS_QUANTITY} Points + {OBJECTS_QUANTITY} Lines: "
+        f"{size / 1024 / 1024:.1f} MB"
+    )
+
+
+def bench_move_entity(repeat: int):
+    world = Game().world
+    player = Player(Point(4, 4))
+    world.spawn_entity(player)
+    forward = Point(0.01, 0.01)
+    backward = Point(-0.01, -0.01)
+
+    def move():
+        player.move(4, 4)
+        for i in range(MOVES_QUANTITY):
+            world.move_entity(player, forward if i % 200 < 100 else backward)
+
+    print(f"{MOVES_QUANTITY} World.move_entity: {best_time(move, repeat):.3f} s")
+
+
+def bench_rotate(repeat: int):
+    center = Point(1, 2)
+
+    def rotate_points():
+        for i in range(CALLS_QUANTITY):
+            rotate(1.0, i, center)
+
+    print(f"{CALLS_QUANTITY} rotate: {best_time(rotate_points, repeat):.3f} s")
+
+
+def bench_intersection(repeat: int):
+    line = Line(Point(0, 0), Point(3, 3))
+    other_line = Line(Point(0, 3), Point(3, 0))
+
+    def intersect():
+        for _ in range(CALLS_QUANTITY):
+            line.get_intersection_segment(other_line)
+
+    print(
+        f"{CALLS_QUANTITY} Line.get_intersection_segment: "
+        f"{best_time(intersect, repeat):.3f} s"
+    )
+
+
+def bench_cast_rays(repeat: int):
+    map = Game().world.map
+    min_x, min_y, max_x, max_y = map.get_map_bounds()
+    origin = Point((min_x + max_x) / 2, (min_y + max_y) / 2)
+
+    for rays_quantity in RAYS_QUANTITIES:
+        directions = [i * 80 / rays_quantity for i in range(rays_quantity)]
+
+        def cast():
+            for _ in range(RAYS_CASTS_QUANTITY):
+                map.cast_rays(origin, directions)
+
+        duration = best_time(cast, repeat) / RAYS_CASTS_QUANTITY
+        print(
+            f"Map.cast_rays ({len(map.walls)} walls, {rays_quantity} rays): "
+            f"{duration * 1000:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    bench_memory()
+    bench_move_entity(repeat)
+    bench_rotate(repeat)
+    bench_intersection(repeat)
+    bench_cast_rays(repeat)
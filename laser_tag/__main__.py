@@ -91,20 +91,27 @@ if __name__ == "__main__":
                 )
 
         if client_server.is_client_connected():
-            # Send
-            client_server.get_client().add_events_to_send(
-                [
-                    event
-                    for event in events + server_events
-                    if not event.local and not (game.game_paused and event.game)
-                ]
-            )
-
             # Receive
+            received_data = client_server.get_client().get_received_data()
+            for state in received_data:
+                game.set_state(state)
+            if len(received_data) > 0:
+                # Reconcile with the inputs not processed by the server yet
+                game.replay_inputs(
+                    *client_server.get_client().get_unprocessed_inputs(
+                        received_data[-1].get("input_sequence")
+                    )
+                )
+
+            # Send (predicted by the update of this frame)
             if client_server.is_client_connected():
-                received_data = client_server.get_client().get_received_data()
-                for state in received_data:
-                    game.set_state(state)
+                client_server.get_client().add_events_to_send(
+                    [
+                        event
+                        for event in events + server_events
+                        if not event.local and not (game.game_paused and event.game)
+                    ]
+                )
 
         if client_server.get_client() is not None:
             # Display
@@ -22,18 +22,57 @@ SCREENSHOTS_PATH = Path("screenshots")
 
 # Networking
 NETWORK_BUFFER_SIZE = 32768
+NETWORK_MAX_MESSAGE_SIZE = 8 * 1024 * 1024
+NETWORK_SEND_QUEUE_LIMIT = 8
 SERVER_DEFAULT_MAX_CLIENTS = None
 SERVER_DELTA_TIME_NAME = "SERVER"
+SERVER_DEFAULT_TICK_RATE = 60
+SERVER_SNAPSHOTS_HISTORY = 64
 SERVER_TIMEOUT = 10
 SERVER_SOCKET_TIMEOUT = 2
 SERVER_EVENTS_LIFESPAN = 3
+# Lag compensation: recorded ticks and maximum rewind of laser rays (seconds)
+GAME_POSITION_HISTORY_SIZE = 64
+SERVER_MAX_REWIND = 0.5
+# Maximum speed of the players (move speed * run multiplier per frame), rewound
+# laser rays search their targets within the distance travelled in the rewind
+SERVER_REWIND_PLAYER_SPEED = 0.05 * 1.5 * TARGET_FPS
+CLIENT_TIME_OFFSET_SMOOTHING = 0.1
+# Area of interest: radius around the player (rays distance), line of sight check
+# and interval (snapshots) of the scoreboard entries of the players out of interest
+SERVER_INTEREST_RADIUS = 50
+SERVER_INTEREST_LINE_OF_SIGHT = False
+SERVER_INTEREST_FAR_INTERVAL = 30
 CLIENT_TIMEOUT = 5
 CLIENT_MINIMUM_TICK = 30
+# Client-side prediction: inputs kept until processed by the server
+CLIENT_INPUTS_HISTORY = 256
+CLIENT_REPLAY_DELTA_TIME_NAME = "REPLAY"
+# Snapshot interpolation: maximum extrapolation after the last snapshot (seconds)
+CLIENT_MAX_EXTRAPOLATION = 0.1
 
 # Performance
-DEFAULT_TEXTURE_CACHE_LIMIT = 128
+# Resized textures cache of each texture: size (bytes) and sizes quantization
+# (relative, log scale)
+DEFAULT_TEXTURE_CACHE_SIZE = 32 * 1024 * 1024
+TEXTURE_CACHE_SIZE_PRECISION = 0.01
+# Wall columns cache of each texture: size (bytes) and height quantization
+# (relative, log scale)
+WALL_COLUMNS_CACHE_SIZE = 16 * 1024 * 1024
+WALL_COLUMNS_HEIGHT_PRECISION = 0.01
+# Distance darkening of the walls (levels of pre-darkened columns)
+WALL_SHADING_LEVELS = 32
 MAX_WALL_HEIGHT = 2500
 MAX_RAY_DISTANCE = 50
+# Batches of rays cast with NumPy (if installed) from this number of rays,
+# maximum number of ray-wall tests computed at once and distance of the first
+# ring of walls tested (doubled for each next ring)
+RAYCASTING_NUMPY_MIN_RAYS = 16
+RAYCASTING_NUMPY_CHUNK_SIZE = 2**18
+RAYCASTING_NUMPY_FIRST_RING = 2
+# Map spatial partitioning: cell size (world units) and coarse cell size (cells)
+MAP_CELL_SIZE = 1
+MAP_COARSE_CELL_SIZE = 8
 
 MAX_PLAYER_NAME_LENGTH = 16
 
@@ -47,6 +47,11 @@ class Variables:
         self.ray_width = 15
         self.rays_quantity = 1920 // self.ray_width
         self.world_scale = 1200
+        # Walls drawn with NumPy instead of blitting columns (if installed)
+        self.numpy_wall_renderer = False
+
+        # Other entities are displayed between the snapshots received this late
+        self.interpolation_delay = 0.1
 
         self.latest_join_ip = "localhost"
         self.latest_join_port = 8000
@@ -26,7 +26,9 @@ class BarrelShort(GameEntity):
             if position is None:
                 return None
 
-            return BarrelShort(position)
+            entity = BarrelShort(position)
+            entity.set_state(parsed_object)
+            return entity
         except:
             return None
 
@@ -34,5 +36,14 @@ class BarrelShort(GameEntity):
     def entity_radius() -> float:
         return 0.25
 
+    def get_state(self) -> list:
+        return [self.position]
+
+    def set_state(self, parsed_object):
+        """Updates the entity in place from a parsed object (see create())"""
+        position = Point.create(parsed_object[0])
+        self.position.x = position.x
+        self.position.y = position.y
+
     def death(self):
         super().death(no_deletion=True)
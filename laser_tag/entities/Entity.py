@@ -28,11 +28,23 @@ class Entity:
                 return None
 
             entity = Entity(position, radius)
-            entity.rotation = float(parsed_object[2])
+            entity.set_state(parsed_object)
             return entity
         except:
             return None
 
+    def get_state(self) -> list:
+        """Values of the entity, in the order expected by create()"""
+        return [self.position, self.collider.radius, self.rotation]
+
+    def set_state(self, parsed_object):
+        """Updates the entity in place from a parsed object (see create())"""
+        position = Point.create(parsed_object[0])
+        self.position.x = position.x
+        self.position.y = position.y
+        self.collider.radius = float(parsed_object[1])
+        self.rotation = float(parsed_object[2])
+
     def move(self, x: float, y: float):
         self.position.x = x
         self.position.y = y
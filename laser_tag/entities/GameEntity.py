@@ -51,15 +51,7 @@ class GameEntity(Entity):
                 return None
 
             entity = GameEntity(position, radius)
-            entity.rotation = float(parsed_object[2])
-            entity.team = Team(parsed_object[3])
-            entity.score = float(parsed_object[4])
-            entity.eliminations = int(parsed_object[5])
-            entity.deaths = int(parsed_object[6])
-            entity.hp = float(parsed_object[7])
-            entity.next_attack_timestamps = float(parsed_object[8])
-            entity.can_move = bool(parsed_object[9])
-            entity.can_attack = bool(parsed_object[10])
+            entity.set_state(parsed_object)
             return entity
         except:
             return None
@@ -68,6 +60,37 @@ class GameEntity(Entity):
     def entity_radius() -> float:
         return 0
 
+    def get_state(self) -> list:
+        return [
+            self.position,
+            self.collider.radius,
+            self.rotation,
+            self.team,
+            self.score,
+            self.eliminations,
+            self.deaths,
+            self.hp,
+            self.next_attack_timestamps,
+            self.can_move,
+            self.can_attack,
+        ]
+
+    def set_state(self, parsed_object):
+        """Updates the entity in place from a parsed object (see create())"""
+        position = Point.create(parsed_object[0])
+        self.position.x = position.x
+        self.position.y = position.y
+        self.collider.radius = float(parsed_object[1])
+        self.rotation = float(parsed_object[2])
+        self.team = Team(parsed_object[3])
+        self.score = float(parsed_object[4])
+        self.eliminations = int(parsed_object[5])
+        self.deaths = int(parsed_object[6])
+        self.hp = float(parsed_object[7])
+        self.next_attack_timestamps = float(parsed_object[8])
+        self.can_move = bool(parsed_object[9])
+        self.can_attack = bool(parsed_object[10])
+
     def reset(self):
         self.hp = self.max_hp
         self.next_attack_timestamps = time()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from ..game.Team import Team
+from ..math.Circle import Circle
 from ..math.Line import Line
 from ..math.Point import Point
 from .GameEntity import GameEntity
@@ -20,6 +21,8 @@ class LaserRay(GameEntity):
         self.parent_id = parent_id
         self.get_entity_fct = None
         self.time_to_live = 0.1
+        # Seconds the targets are rewound to when colliding (server only)
+        self.rewind_time = 0
 
         self.ray = Line(self.position, self.end_position)
 
@@ -35,13 +38,7 @@ class LaserRay(GameEntity):
                 return None
 
             entity = LaserRay(position, end_position, parsed_object[2])
-            entity.rotation = float(parsed_object[3])
-            entity.team = Team(parsed_object[4])
-            entity.damages = int(parsed_object[5])
-            entity.score = float(parsed_object[6])
-            entity.eliminations = int(parsed_object[7])
-            entity.time_to_live = float(parsed_object[8])
-            entity.can_attack = bool(parsed_object[9])
+            entity.set_state(parsed_object)
             return entity
         except:
             return None
@@ -50,6 +47,38 @@ class LaserRay(GameEntity):
     def entity_radius() -> float:
         return 0
 
+    def get_state(self) -> list:
+        return [
+            self.position,
+            self.end_position,
+            self.parent_id,
+            self.rotation,
+            self.team,
+            self.damages,
+            self.score,
+            self.eliminations,
+            self.time_to_live,
+            self.can_attack,
+        ]
+
+    def set_state(self, parsed_object):
+        """Updates the entity in place from a parsed object (see create())"""
+        position = Point.create(parsed_object[0])
+        end_position = Point.create(parsed_object[1])
+        self.position.x = position.x
+        self.position.y = position.y
+        self.end_position.x = end_position.x
+        self.end_position.y = end_position.y
+        self.parent_id = parsed_object[2]
+        self.ray = Line(self.position, self.end_position)
+        self.rotation = float(parsed_object[3])
+        self.team = Team(parsed_object[4])
+        self.damages = int(parsed_object[5])
+        self.score = float(parsed_object[6])
+        self.eliminations = int(parsed_object[7])
+        self.time_to_live = float(parsed_object[8])
+        self.can_attack = bool(parsed_object[9])
+
     def on_hit(self, entity: GameEntity):
         super().on_hit(entity)
         self.death()
@@ -80,3 +109,7 @@ class LaserRay(GameEntity):
 
     def collides_with(self, other: GameEntity) -> bool:
         return other.collider.collides_with_segment(self.ray)
+
+    def collides_with_position(self, other: GameEntity, position: Point) -> bool:
+        """Collision with the entity at another position"""
+        return Circle(position, other.collider.radius).collides_with_segment(self.ray)
@@ -45,22 +45,7 @@ class Player(GameEntity):
                 return None
 
             entity = Player(position)
-            entity.rotation = float(parsed_object[1])
-            entity.team = Team(parsed_object[2])
-            entity.score = float(parsed_object[3])
-            entity.eliminations = int(parsed_object[4])
-            entity.deaths = int(parsed_object[5])
-            entity.hp = float(parsed_object[6])
-            entity.next_attack_timestamps = float(parsed_object[7])
-            entity.deactivated_until_timestamp = float(parsed_object[8])
-            entity.deactivation_time_ratio = float(parsed_object[9])
-            entity.can_move = bool(parsed_object[10])
-            entity.can_attack = bool(parsed_object[11])
-            entity.is_running = bool(parsed_object[12])
-            entity.is_shooting = bool(parsed_object[13])
-            entity.is_moving = bool(parsed_object[14])
-            entity.holding_restart = bool(parsed_object[15])
-            entity.name = str(parsed_object[16])
+            entity.set_state(parsed_object)
             return entity
         except:
             return None
@@ -69,6 +54,50 @@ class Player(GameEntity):
     def entity_radius() -> float:
         return 0.2
 
+    def get_state(self) -> list:
+        return [
+            self.position,
+            self.rotation,
+            self.team,
+            self.score,
+            self.eliminations,
+            self.deaths,
+            self.hp,
+            self.next_attack_timestamps,
+            self.deactivated_until_timestamp,
+            # Clamped (as displayed) to stay unchanged in delta snapshots
+            min(1, self.get_deactivation_time_ratio()),
+            self.can_move,
+            self.can_attack,
+            self.is_running,
+            self.is_shooting,
+            self.is_moving,
+            self.holding_restart,
+            self.name,
+        ]
+
+    def set_state(self, parsed_object):
+        """Updates the entity in place from a parsed object (see create())"""
+        position = Point.create(parsed_object[0])
+        self.position.x = position.x
+        self.position.y = position.y
+        self.rotation = float(parsed_object[1])
+        self.team = Team(parsed_object[2])
+        self.score = float(parsed_object[3])
+        self.eliminations = int(parsed_object[4])
+        self.deaths = int(parsed_object[5])
+        self.hp = float(parsed_object[6])
+        self.next_attack_timestamps = float(parsed_object[7])
+        self.deactivated_until_timestamp = float(parsed_object[8])
+        self.deactivation_time_ratio = float(parsed_object[9])
+        self.can_move = bool(parsed_object[10])
+        self.can_attack = bool(parsed_object[11])
+        self.is_running = bool(parsed_object[12])
+        self.is_shooting = bool(parsed_object[13])
+        self.is_moving = bool(parsed_object[14])
+        self.holding_restart = bool(parsed_object[15])
+        self.name = str(parsed_object[16])
+
     def get_deactivation_time_ratio(self) -> float:
         return 1 - (self.deactivated_until_timestamp - time()) / self.deactivation_time
 
@@ -5,6 +5,13 @@ from .GameEntity import GameEntity
 from .LaserRay import LaserRay
 from .Player import Player
 
+# Entity type id is the index in this list (used by the network protocol)
+entity_types = [Entity, GameEntity, Player, LaserRay, BarrelShort, BarrelTall]
+
+
+def get_entity_type_id(entity: Entity) -> int:
+    return entity_types.index(type(entity))
+
 
 def create_entity(parsed_object: list):
     try:
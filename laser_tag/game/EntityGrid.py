@@ -0,0 +1,127 @@
+from math import ceil, floor
+
+from ..entities.Entity import Entity
+from ..math.Line import Line
+from ..math.Point import Point
+
+
+class EntityGrid:
+    """Spatial grid partitioning of entities, stores entity uid in each cell"""
+
+    def __init__(self, cell_size: float = 1):
+        self.cell_size = cell_size
+        self.cells: dict[tuple[int, int], set[int]] = {}
+        # Cells range covered by each entity (min x, min y, max x, max y)
+        self.entities_bounds: dict[int, tuple[int, int, int, int]] = {}
+
+    def get_bounds(self, entity: Entity) -> tuple[int, int, int, int]:
+        collider = entity.collider
+        max_x = (collider.origin.x + collider.radius) / self.cell_size
+        max_y = (collider.origin.y + collider.radius) / self.cell_size
+        # Line.get_coordinates truncates negative coordinates toward zero
+        return (
+            floor((collider.origin.x - collider.radius) / self.cell_size),
+            floor((collider.origin.y - collider.radius) / self.cell_size),
+            max(floor(max_x), int(max_x)),
+            max(floor(max_y), int(max_y)),
+        )
+
+    def add_entity(self, uid: int, entity: Entity):
+        bounds = self.get_bounds(entity)
+        self.entities_bounds[uid] = bounds
+
+        for x in range(bounds[0], bounds[2] + 1):
+            for y in range(bounds[1], bounds[3] + 1):
+                if (x, y) not in self.cells:
+                    self.cells[(x, y)] = set()
+                self.cells[(x, y)].add(uid)
+
+    def remove_entity(self, uid: int):
+        bounds = self.entities_bounds.pop(uid, None)
+        if bounds is None:
+            return
+
+        for x in range(bounds[0], bounds[2] + 1):
+            for y in range(bounds[1], bounds[3] + 1):
+                cell = self.cells.get((x, y))
+                if cell is not None:
+                    cell.discard(uid)
+                    if len(cell) == 0:
+                        del self.cells[(x, y)]
+
+    def update_entity(self, uid: int, entity: Entity):
+        """Moves the entity in the grid only if its cells changed"""
+        if self.entities_bounds.get(uid) != self.get_bounds(entity):
+            self.remove_entity(uid)
+            self.add_entity(uid, entity)
+
+    def update(self, entities: dict[int, Entity]):
+        """Synchronizes the grid with the entities of the world"""
+        for uid in list(self.entities_bounds.keys()):
+            if uid not in entities:
+                self.remove_entity(uid)
+
+        for uid, entity in entities.items():
+            self.update_entity(uid, entity)
+
+    def get_entities_on_line(self, line: Line, margin: float = 0) -> list[int]:
+        """Returns the uid of entities in the cells crossed by a line (sorted)
+
+        With a margin, also the entities in the cells within margin of these cells
+        """
+        uids = set()
+
+        if self.cell_size != 1:
+            # Line in grid units
+            line = Line(
+                Point(line.point1.x / self.cell_size, line.point1.y / self.cell_size),
+                Point(line.point2.x / self.cell_size, line.point2.y / self.cell_size),
+            )
+
+        if margin <= 0:
+            for coordinate in line.get_coordinates():
+                cell = self.cells.get(coordinate)
+                if cell is not None:
+                    uids.update(cell)
+
+            return sorted(uids)
+
+        # Range of crossed cells of each column, widened by the margin
+        cells_margin = ceil(margin / self.cell_size)
+        columns: dict[int, tuple[int, int]] = {}
+        for x, y in line.get_coordinates():
+            for column in range(x - cells_margin, x + cells_margin + 1):
+                rows = columns.get(column)
+                if rows is None:
+                    columns[column] = (y - cells_margin, y + cells_margin)
+                else:
+                    columns[column] = (
+                        min(rows[0], y - cells_margin),
+                        max(rows[1], y + cells_margin),
+                    )
+
+        for x, (min_y, max_y) in columns.items():
+            for y in range(min_y, max_y + 1):
+                cell = self.cells.get((x, y))
+                if cell is not None:
+                    uids.update(cell)
+
+        return sorted(uids)
+
+    def get_entities_in_area(
+        self, min_x: float, min_y: float, max_x: float, max_y: float
+    ) -> set[int]:
+        """Returns the uid of entities in the cells overlapping an area"""
+        uids = set()
+
+        for x in range(
+            floor(min_x / self.cell_size), floor(max_x / self.cell_size) + 1
+        ):
+            for y in range(
+                floor(min_y / self.cell_size), floor(max_y / self.cell_size) + 1
+            ):
+                cell = self.cells.get((x, y))
+                if cell is not None:
+                    uids.update(cell)
+
+        return uids
@@ -0,0 +1,71 @@
+from ..entities.Entity import Entity
+
+
+class EntityStore(dict):
+    """Entities by uid, indexed by entity type
+
+    get_entities(Player) returns the players without checking the type of
+    every entity
+    """
+
+    def __init__(self, entities: dict[int, Entity] | None = None):
+        super().__init__()
+        # Entities by uid, for each type and parent type of the entities
+        self.types: dict[type, dict[int, Entity]] = {}
+        if entities is not None:
+            self.update(entities)
+
+    def add_to_types(self, uid: int, entity: Entity):
+        for entity_type in type(entity).__mro__[:-1]:
+            if entity_type not in self.types:
+                self.types[entity_type] = {}
+            self.types[entity_type][uid] = entity
+
+    def remove_from_types(self, uid: int, entity: Entity):
+        for entity_type in type(entity).__mro__[:-1]:
+            self.types[entity_type].pop(uid, None)
+
+    def __setitem__(self, uid: int, entity: Entity):
+        previous_entity = super().get(uid)
+        # Same type entity keeps its place in the types
+        if previous_entity is not None and type(previous_entity) is not type(entity):
+            self.remove_from_types(uid, previous_entity)
+        super().__setitem__(uid, entity)
+        self.add_to_types(uid, entity)
+
+    def __delitem__(self, uid: int):
+        self.remove_from_types(uid, super().__getitem__(uid))
+        super().__delitem__(uid)
+
+    def pop(self, uid: int, *default):
+        if uid in self:
+            self.remove_from_types(uid, super().__getitem__(uid))
+        return super().pop(uid, *default)
+
+    def popitem(self) -> tuple[int, Entity]:
+        uid, entity = super().popitem()
+        self.remove_from_types(uid, entity)
+        return uid, entity
+
+    def setdefault(self, uid: int, default: Entity = None) -> Entity:
+        if uid not in self:
+            self[uid] = default
+        return self[uid]
+
+    def update(self, *args, **kwargs):
+        for uid, entity in dict(*args, **kwargs).items():
+            self[uid] = entity
+
+    def clear(self):
+        super().clear()
+        self.types.clear()
+
+    def get_entities(self, entity_type: type) -> dict[int, Entity]:
+        """Entities of the type (and its subtypes) by uid
+
+        The returned dict is updated with the store, copy it to remove entities
+        while iterating
+        """
+        if entity_type not in self.types:
+            self.types[entity_type] = {}
+        return self.types[entity_type]
@@ -1,4 +1,6 @@
-from ..configuration import VARIABLES
+from time import time
+
+from ..configuration import CLIENT_TIME_OFFSET_SMOOTHING, VARIABLES
 from ..entities.Player import Player
 from ..events.Event import Event
 from ..events.EventInstance import EventInstance
@@ -27,6 +29,10 @@ class Game:
         self.lock_cursor = True
         self.game_paused = False
 
+        # Offset from the local clock to the server time, estimated from the
+        # snapshots timestamps (None if the server does not send them)
+        self.server_time_offset = None
+
     def __repr__(self):
         return f"[{self.game_mode},{self.world},{self.server_events}]"
 
@@ -45,6 +51,12 @@ class Game:
 
             self.server_events.set_state(parsed_object["game"][2])
 
+            if parsed_object.get("scoreboard") is not None:
+                self.world.set_scoreboard_state(parsed_object["scoreboard"])
+
+            if parsed_object.get("timestamp") is not None:
+                self.update_server_time(parsed_object["timestamp"])
+
             # Ignore rotation from the server
             if controlled_entity_rotation is not None:
                 self.world.get_entity(self.world.controlled_entity).rotation = (
@@ -55,12 +67,40 @@ class Game:
             if VARIABLES.debug:
                 print("Error setting game state", e)
 
+    def update_server_time(self, timestamp: float):
+        """Buffers the positions of the snapshot received at the server timestamp"""
+        offset = timestamp - time()
+        if self.server_time_offset is None:
+            self.server_time_offset = offset
+        else:
+            self.server_time_offset += (
+                offset - self.server_time_offset
+            ) * CLIENT_TIME_OFFSET_SMOOTHING
+
+        # Snapshots received out of order are not buffered
+        last_timestamp = self.world.position_history.get_last_timestamp()
+        if last_timestamp is None or timestamp > last_timestamp:
+            self.world.record_positions(timestamp)
+
+    def get_interpolation_timestamp(self) -> float | None:
+        """Server time the other entities are displayed at"""
+        if self.server_time_offset is None:
+            return None
+        return time() + self.server_time_offset - VARIABLES.interpolation_delay
+
+    def replay_inputs(self, inputs: list[list[EventInstance]], timestamp: float):
+        """Client-side prediction of the inputs not processed by the server yet"""
+        # Movement is only processed by the server during the game
+        if timestamp is None or not self.game_mode.is_game_started():
+            return
+        self.world.replay_inputs(inputs, timestamp)
+
     def reset(self):
-        for entity_id, entity in self.world.entities.items():
+        for entity in self.world.entities.values():
             entity.reset()
-            if isinstance(entity, Player):
-                spawn_point = self.world.map.get_spawn_point(entity_id)
-                entity.move(spawn_point.x, spawn_point.y)
+        for entity_id, entity in self.world.entities.get_entities(Player).items():
+            spawn_point = self.world.map.get_spawn_point(entity_id)
+            entity.move(spawn_point.x, spawn_point.y)
 
     def enhance_events(self, events: list[EventInstance]):
         i = 0
@@ -104,6 +144,10 @@ class Game:
                         )
                     )
 
+            if event.id == Event.GAME_SHOOT and self.server_time_offset is not None:
+                # The server rewinds the targets to the interpolated positions
+                event.data = VARIABLES.interpolation_delay
+
             i += 1
 
         self.world.enhance_events(events)
@@ -114,12 +158,13 @@ class Game:
         controlled_entity_id=None,
         delta_time=DeltaTime(),
         player_delta_time: DeltaTime = None,
+        player_time_offset: float = None,
     ):
         delta_time.update()
 
         self.show_scoreboard = self.game_mode.game_finished
 
-        self.game_mode.update(self.world.entities)
+        self.game_mode.update(self.world.entities, self.world.get_scoreboard_players())
 
         for event in events:
             if event.server:
@@ -186,12 +231,17 @@ class Game:
             # Check hold to restart
             holding_player_count = 0
             player_count = 0
-            for entity in self.world.entities.values():
-                if isinstance(entity, Player):
-                    player_count += 1
-                    if entity.holding_restart:
-                        holding_player_count += 1
+            for entity in self.world.entities.get_entities(Player).values():
+                player_count += 1
+                if entity.holding_restart:
+                    holding_player_count += 1
             if holding_player_count == player_count:
                 self.game_mode.reset(self.game_mode.game_mode)
 
-        self.world.update(events, controlled_entity_id, delta_time, player_delta_time)
+        self.world.update(
+            events,
+            controlled_entity_id,
+            delta_time,
+            player_delta_time,
+            player_time_offset,
+        )
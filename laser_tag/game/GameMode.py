@@ -1,10 +1,10 @@
 from time import time
 
 from ..configuration import VARIABLES
-from ..entities.GameEntity import GameEntity
 from ..entities.Player import Player
 from ..language.Language import Language
 from ..language.LanguageKey import LanguageKey
+from .EntityStore import EntityStore
 from .Mode import Mode, player_modes, team_modes
 from .Team import Team, get_team_color, get_team_language_key
 
@@ -63,30 +63,38 @@ class GameMode:
     def is_game_started(self) -> bool:
         return self.game_started
 
-    def update_leaderboard(self, entities: list[GameEntity]):
+    def get_players(
+        self, entities: EntityStore, scoreboard_players: list[Player] | None
+    ) -> list[Player]:
+        """Players of the entities and players only known by their scoreboard entry"""
+        players = list(entities.get_entities(Player).values())
+        if scoreboard_players is not None:
+            players += scoreboard_players
+        return players
+
+    def update_leaderboard(
+        self, entities: EntityStore, scoreboard_players: list[Player] | None = None
+    ):
         self.leaderboard.clear()
+        players = self.get_players(entities, scoreboard_players)
 
         if self.game_mode in player_modes:
-            for entity in entities.values():
-                if isinstance(entity, Player):
-                    if self.game_mode == Mode.SOLO:
-                        self.leaderboard.append(
-                            [int(entity.score), entity.team, entity.name]
-                        )
-                    else:
-                        self.leaderboard.append(
-                            [entity.eliminations, entity.team, entity.name]
-                        )
+            for entity in players:
+                if self.game_mode == Mode.SOLO:
+                    self.leaderboard.append(
+                        [int(entity.score), entity.team, entity.name]
+                    )
+                else:
+                    self.leaderboard.append(
+                        [entity.eliminations, entity.team, entity.name]
+                    )
         elif self.game_mode in team_modes:
             teams = {}
-            for entity in entities.values():
-                if isinstance(entity, Player):
-                    if self.game_mode == Mode.TEAM:
-                        teams[entity.team] = teams.get(entity.team, 0) + entity.score
-                    else:
-                        teams[entity.team] = (
-                            teams.get(entity.team, 0) + entity.eliminations
-                        )
+            for entity in players:
+                if self.game_mode == Mode.TEAM:
+                    teams[entity.team] = teams.get(entity.team, 0) + entity.score
+                else:
+                    teams[entity.team] = teams.get(entity.team, 0) + entity.eliminations
 
             for team, score in teams.items():
                 self.leaderboard.append(
@@ -99,12 +107,12 @@ class GameMode:
         except ValueError:
             pass
 
-    def update_scoreboard(self, entities: list[GameEntity]):
+    def update_scoreboard(
+        self, entities: EntityStore, scoreboard_players: list[Player] | None = None
+    ):
         self.scoreboard.clear()
 
-        for entity in entities.values():
-            if isinstance(entity, Player):
-                self.scoreboard.append(entity)
+        self.scoreboard += self.get_players(entities, scoreboard_players)
 
         # Sort
         try:
@@ -149,7 +157,12 @@ class GameMode:
         self.grace_period_end = 0
         self.game_time_end = time() - 1
 
-    def update(self, entities: list[GameEntity]):
+    def update(
+        self, entities: EntityStore, scoreboard_players: list[Player] | None = None
+    ):
+        """Updates the game state, the scoreboard players are the players out of
+        the area of interest of the client
+        """
         if not self.game_started or self.game_finished:
             for entity in entities.values():
                 entity.can_attack = False
@@ -168,6 +181,6 @@ class GameMode:
             self.game_time_end = 0
 
         # Leaderboard
-        self.update_leaderboard(entities)
+        self.update_leaderboard(entities, scoreboard_players)
         # Scoreboard
-        self.update_scoreboard(entities)
+        self.update_scoreboard(entities, scoreboard_players)
@@ -1,44 +1,152 @@
-from math import ceil
+from array import array
+from math import ceil, cos, floor, sin
 from typing import TypedDict
 
-from ..configuration import MAX_RAY_DISTANCE
+from ..configuration import (
+    MAP_CELL_SIZE,
+    MAP_COARSE_CELL_SIZE,
+    MAX_RAY_DISTANCE,
+    RAYCASTING_NUMPY_CHUNK_SIZE,
+    RAYCASTING_NUMPY_FIRST_RING,
+    RAYCASTING_NUMPY_MIN_RAYS,
+)
 from ..math.Circle import Circle
-from ..math.distance import distance_points
+from ..math.degrees_radians import degrees_to_radians
+from ..math.distance import distance
 from ..math.Line import Line
 from ..math.Point import Point
-from ..math.rotations import rotate
 from .Ray import Ray
 from .Wall import Wall, WallType
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class IntersectionData(TypedDict):
     intersection_point: Point
     line_intersecting: Line
     distance: float
     wall_type: WallType
+    wall_index: int
+    wall_rotation: float
+    ratio: float
+
+
+class RaysHits(TypedDict):
+    """Results of a batch of rays, one value per ray
+
+    Rays that hit nothing have a distance of 0 and a wall index of -1
+    """
+
+    distances: array
+    hit_x: array
+    hit_y: array
+    wall_indices: array
+    ratios: array
 
 
 class Map:
     """Represents a map in the game and checks collisions"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        cell_size: float = MAP_CELL_SIZE,
+        coarse_cell_size: int = MAP_COARSE_CELL_SIZE,
+    ):
         self.walls: list[Wall] = []
 
         self.spawn_points: list[Point] = []
 
         # Spatial grid partitioning, stores wall index in each cell
-        self.spatial_partitioning = {}
+        self.cell_size = cell_size
+        self.spatial_partitioning: dict[tuple[int, int], set[int]] = {}
+        # Cells of each wall, indexed like self.walls
+        self.walls_cells: list[list[tuple[int, int]]] = []
+        # Coarse grid (coarse_cell_size x coarse_cell_size cells), stores the
+        # number of non-empty cells in each coarse cell to skip empty regions
+        self.coarse_cell_size = coarse_cell_size
+        self.coarse_partitioning: dict[tuple[int, int], int] = {}
         self.map_min_x = self.map_min_y = self.map_max_x = self.map_max_y = None
 
+        # Packed wall geometry, indexed like self.walls
+        self.walls_x1 = array("d")
+        self.walls_y1 = array("d")
+        self.walls_x2 = array("d")
+        self.walls_y2 = array("d")
+        # Direction vector (point1 to point2) and its squared length
+        self.walls_dx = array("d")
+        self.walls_dy = array("d")
+        self.walls_length_squared = array("d")
+        # Line.get_rotation() of each wall
+        self.walls_rotation = array("d")
+
         self.set_walls([])
 
         rounding_precision = 10
         self.margin = 10**-rounding_precision
 
     def set_walls(self, walls: list[Wall]):
-        self.walls = walls
+        self.walls = list(walls)
+        self.generate_walls_cache()
         self.generate_partitioning_cache()
 
+    def add_wall(self, wall: Wall) -> int:
+        """Adds a wall and returns its index"""
+        index = len(self.walls)
+        self.walls.append(wall)
+
+        self.append_wall_cache(wall.get_line())
+        self.walls_cells.append(self.get_wall_cells(wall.get_line()))
+        self.add_to_partitioning(index)
+        self.extend_map_bounds(index)
+
+        return index
+
+    def remove_wall(self, index: int) -> Wall:
+        """Removes a wall, the last wall takes its index"""
+        wall = self.walls[index]
+        bounds = self.get_wall_bounds(index)
+        self.remove_from_partitioning(index)
+
+        last_index = len(self.walls) - 1
+        if index != last_index:
+            self.remove_from_partitioning(last_index)
+            self.walls[index] = self.walls[last_index]
+            self.walls_cells[index] = self.walls_cells[last_index]
+            for walls_array in self.get_walls_arrays():
+                walls_array[index] = walls_array[last_index]
+            self.add_to_partitioning(index)
+
+        self.walls.pop()
+        self.walls_cells.pop()
+        for walls_array in self.get_walls_arrays():
+            walls_array.pop()
+
+        if self.is_on_map_bounds(bounds):
+            self.generate_map_bounds()
+
+        return wall
+
+    def move_wall(self, index: int, line: Line):
+        """Moves a wall to a new line"""
+        bounds = self.get_wall_bounds(index)
+        self.remove_from_partitioning(index)
+
+        self.walls[index].line = line
+        self.walls_cells[index] = self.get_wall_cells(line)
+        for walls_array, value in zip(
+            self.get_walls_arrays(), self.get_wall_cache(line)
+        ):
+            walls_array[index] = value
+        self.add_to_partitioning(index)
+
+        if self.is_on_map_bounds(bounds):
+            self.generate_map_bounds()
+        else:
+            self.extend_map_bounds(index)
+
     def get_spawn_point(self, id=None) -> Point:
         if len(self.spawn_points) == 0:
             return Point(0, 0)
@@ -57,85 +165,603 @@ class Map:
             self.map_max_y,
         )
 
+    def set_cell_size(self, cell_size: float, coarse_cell_size: int = None):
+        self.cell_size = cell_size
+        if coarse_cell_size is not None:
+            self.coarse_cell_size = coarse_cell_size
+        self.generate_partitioning_cache()
+
+    def get_wall_cells(self, line: Line) -> list[tuple[int, int]]:
+        """Returns the cells of the grid a wall passes through"""
+        if self.cell_size == 1:
+            return line.get_coordinates()
+        return Line(
+            Point(line.point1.x / self.cell_size, line.point1.y / self.cell_size),
+            Point(line.point2.x / self.cell_size, line.point2.y / self.cell_size),
+        ).get_coordinates()
+
+    def get_coarse_cell(self, cell: tuple[int, int]) -> tuple[int, int]:
+        return (cell[0] // self.coarse_cell_size, cell[1] // self.coarse_cell_size)
+
     def generate_partitioning_cache(self):
         self.spatial_partitioning = {}
-        self.map_min_x = self.map_min_y = self.map_max_x = self.map_max_y = None
+        self.coarse_partitioning = {}
+        self.walls_cells = [self.get_wall_cells(wall.get_line()) for wall in self.walls]
 
         for i in range(len(self.walls)):
-            line: Line = self.walls[i].get_line()
-
-            # Min and max
-            if self.map_min_x is None:
-                self.map_min_x = line.point1.x
-                self.map_min_y = line.point1.y
-                self.map_max_x = line.point1.x
-                self.map_max_y = line.point1.y
-            self.map_min_x = min(self.map_min_x, line.point1.x, line.point2.x)
-            self.map_min_y = min(self.map_min_y, line.point1.y, line.point2.y)
-            self.map_max_x = max(self.map_max_x, line.point1.x, line.point2.x)
-            self.map_max_y = max(self.map_max_y, line.point1.y, line.point2.y)
-
-            for x, y in line.get_coordinates():
-                if (x, y) not in self.spatial_partitioning:
-                    self.spatial_partitioning[(x, y)] = []
-
-                if i not in self.spatial_partitioning[(x, y)]:
-                    self.spatial_partitioning[(x, y)].append(i)
-
-        if self.map_min_x is None:
+            self.add_to_partitioning(i)
+
+        self.generate_map_bounds()
+
+    def add_to_partitioning(self, index: int):
+        for cell in self.walls_cells[index]:
+            if cell not in self.spatial_partitioning:
+                self.spatial_partitioning[cell] = set()
+
+                coarse_cell = self.get_coarse_cell(cell)
+                self.coarse_partitioning[coarse_cell] = (
+                    self.coarse_partitioning.get(coarse_cell, 0) + 1
+                )
+            self.spatial_partitioning[cell].add(index)
+
+    def remove_from_partitioning(self, index: int):
+        for cell in self.walls_cells[index]:
+            cell_walls = self.spatial_partitioning.get(cell)
+            if cell_walls is not None:
+                cell_walls.discard(index)
+                if len(cell_walls) == 0:
+                    del self.spatial_partitioning[cell]
+
+                    coarse_cell = self.get_coarse_cell(cell)
+                    self.coarse_partitioning[coarse_cell] -= 1
+                    if self.coarse_partitioning[coarse_cell] == 0:
+                        del self.coarse_partitioning[coarse_cell]
+
+    def generate_map_bounds(self):
+        if len(self.walls) == 0:
             self.map_min_x = self.map_min_y = self.map_max_x = self.map_max_y = 0
+            return
+
+        self.map_min_x = min(min(self.walls_x1), min(self.walls_x2))
+        self.map_min_y = min(min(self.walls_y1), min(self.walls_y2))
+        self.map_max_x = max(max(self.walls_x1), max(self.walls_x2))
+        self.map_max_y = max(max(self.walls_y1), max(self.walls_y2))
+
+    def extend_map_bounds(self, index: int):
+        min_x, min_y, max_x, max_y = self.get_wall_bounds(index)
+        if len(self.walls) == 1:
+            self.map_min_x, self.map_min_y = min_x, min_y
+            self.map_max_x, self.map_max_y = max_x, max_y
+            return
+
+        self.map_min_x = min(self.map_min_x, min_x)
+        self.map_min_y = min(self.map_min_y, min_y)
+        self.map_max_x = max(self.map_max_x, max_x)
+        self.map_max_y = max(self.map_max_y, max_y)
+
+    def get_wall_bounds(self, index: int) -> tuple[float, float, float, float]:
+        return (
+            min(self.walls_x1[index], self.walls_x2[index]),
+            min(self.walls_y1[index], self.walls_y2[index]),
+            max(self.walls_x1[index], self.walls_x2[index]),
+            max(self.walls_y1[index], self.walls_y2[index]),
+        )
+
+    def is_on_map_bounds(self, bounds: tuple[float, float, float, float]) -> bool:
+        return (
+            bounds[0] <= self.map_min_x
+            or bounds[1] <= self.map_min_y
+            or bounds[2] >= self.map_max_x
+            or bounds[3] >= self.map_max_y
+        )
+
+    def get_walls_arrays(self) -> tuple[array, ...]:
+        """Packed wall geometry arrays, in the order of get_wall_cache()"""
+        return (
+            self.walls_x1,
+            self.walls_y1,
+            self.walls_x2,
+            self.walls_y2,
+            self.walls_dx,
+            self.walls_dy,
+            self.walls_length_squared,
+            self.walls_rotation,
+        )
+
+    def get_wall_cache(self, line: Line) -> tuple[float, ...]:
+        dx = line.point2.x - line.point1.x
+        dy = line.point2.y - line.point1.y
+        return (
+            line.point1.x,
+            line.point1.y,
+            line.point2.x,
+            line.point2.y,
+            dx,
+            dy,
+            dx**2 + dy**2,
+            line.get_rotation(),
+        )
+
+    def generate_walls_cache(self):
+        for walls_array in self.get_walls_arrays():
+            del walls_array[:]
 
-    def collides_with(self, collider: Circle) -> bool:
         for wall in self.walls:
-            if collider.collides_with(wall.get_line()):
+            self.append_wall_cache(wall.get_line())
+
+    def append_wall_cache(self, line: Line):
+        for walls_array, value in zip(
+            self.get_walls_arrays(), self.get_wall_cache(line)
+        ):
+            walls_array.append(value)
+
+    def get_walls_in_area(
+        self, min_x: float, min_y: float, max_x: float, max_y: float
+    ) -> set[int]:
+        """Returns the index of walls passing through cells overlapping an area"""
+        walls = set()
+
+        cell_size = self.cell_size
+        for x in range(floor(min_x / cell_size), ceil(max_x / cell_size) + 1):
+            for y in range(floor(min_y / cell_size), ceil(max_y / cell_size) + 1):
+                cell_walls = self.spatial_partitioning.get((x, y))
+                if cell_walls is not None:
+                    walls.update(cell_walls)
+
+        return walls
+
+    def collides_with(self, collider: Circle) -> bool:
+        origin_x, origin_y = collider.origin.x, collider.origin.y
+        radius = collider.radius
+
+        # Broad phase: only walls near the collider bounding box
+        for wall_index in self.get_walls_in_area(
+            origin_x - radius, origin_y - radius, origin_x + radius, origin_y + radius
+        ):
+            # Same computation as Circle.collides_with_segment
+            wall_start_x = self.walls_x1[wall_index]
+            wall_start_y = self.walls_y1[wall_index]
+            wall_vector_x = self.walls_dx[wall_index]
+            wall_vector_y = self.walls_dy[wall_index]
+
+            length_squared = self.walls_length_squared[wall_index]
+            if length_squared == 0:
+                nearest_x, nearest_y = wall_start_x, wall_start_y
+            else:
+                scale = (
+                    (origin_x - wall_start_x) * wall_vector_x
+                    + (origin_y - wall_start_y) * wall_vector_y
+                ) / length_squared
+                if scale < 0:
+                    nearest_x, nearest_y = wall_start_x, wall_start_y
+                elif scale > 1:
+                    nearest_x = self.walls_x2[wall_index]
+                    nearest_y = self.walls_y2[wall_index]
+                else:
+                    nearest_x = wall_start_x + scale * wall_vector_x
+                    nearest_y = wall_start_y + scale * wall_vector_y
+
+            if distance(origin_x, origin_y, nearest_x, nearest_y) <= radius:
                 return True
 
         return False
 
     def cast_ray(self, origin: Point, direction: float) -> Ray:
+        return self.get_ray(origin, direction, self.cast_rays(origin, [direction]), 0)
+
+    def get_ray(
+        self, origin: Point, direction: float, hits: RaysHits, index: int
+    ) -> Ray:
+        """Creates the Ray object of one ray from a batch of rays"""
         ray = Ray(origin, direction)
 
-        end_point = rotate(MAX_RAY_DISTANCE, direction, center=origin)
-        ray_line = Line(origin, end_point)
+        wall_index = hits["wall_indices"][index]
+        if wall_index != -1:
+            intersection: IntersectionData = {
+                "intersection_point": Point(hits["hit_x"][index], hits["hit_y"][index]),
+                "line_intersecting": self.walls[wall_index].get_line(),
+                "distance": hits["distances"][index],
+                "wall_type": self.walls[wall_index].get_type(),
+                "wall_index": wall_index,
+                "wall_rotation": self.walls_rotation[wall_index],
+                "ratio": hits["ratios"][index],
+            }
+            ray.set_hit(
+                intersection["intersection_point"],
+                hit_infos=intersection,
+                distance=intersection["distance"],
+            )
+
+        return ray
+
+    def cast_rays(
+        self,
+        origin: Point,
+        directions: list[float],
+        direction_vectors: list[tuple[float, float]] | None = None,
+    ) -> RaysHits:
+        """Casts a batch of rays from the same origin against the walls
+
+        Large batches are cast with NumPy when it is installed (optional
+        dependency), see cast_rays_numpy
+
+        Parameters:
+            origin (Point): Origin of the rays
+            directions (list): Direction of each ray (degrees)
+            direction_vectors (list): Cosine and sine of each direction (optional)
+        """
+
+        rays_quantity = len(directions)
+        hits: RaysHits = {
+            "distances": array("d", bytes(8 * rays_quantity)),
+            "hit_x": array("d", bytes(8 * rays_quantity)),
+            "hit_y": array("d", bytes(8 * rays_quantity)),
+            "wall_indices": array("l", [-1]) * rays_quantity,
+            "ratios": array("d", bytes(8 * rays_quantity)),
+        }
+
+        if len(self.walls) == 0:
+            return hits
+
+        if numpy is not None and rays_quantity >= RAYCASTING_NUMPY_MIN_RAYS:
+            self.cast_rays_numpy(origin, directions, direction_vectors, hits)
+            return hits
+
+        # Local references for the inner loop
+        spatial_partitioning = self.spatial_partitioning
+        coarse_partitioning = self.coarse_partitioning
+        coarse_cell_size = self.coarse_cell_size
+        walls_x1, walls_y1 = self.walls_x1, self.walls_y1
+        walls_dx, walls_dy = self.walls_dx, self.walls_dy
+        margin = self.margin
+        max_distance = MAX_RAY_DISTANCE + margin
+
+        # The DDA runs in grid units, intersections in world units
+        cell_size = self.cell_size
+        max_cells_distance = MAX_RAY_DISTANCE / cell_size
+        min_cell_x = int(self.map_min_x / cell_size)
+        min_cell_y = int(self.map_min_y / cell_size)
+        max_cell_x = self.map_max_x / cell_size
+        max_cell_y = self.map_max_y / cell_size
+
+        origin_x, origin_y = origin.x, origin.y
+        grid_origin_x, grid_origin_y = origin_x / cell_size, origin_y / cell_size
+        origin_cell_x, origin_cell_y = int(grid_origin_x), int(grid_origin_y)
+
+        for i in range(rays_quantity):
+            if direction_vectors is not None:
+                direction_x, direction_y = direction_vectors[i]
+            else:
+                angle = degrees_to_radians(directions[i])
+                direction_x = cos(angle)
+                direction_y = sin(angle)
+
+            # DDA: Digital Differential Analyzer (see Line.get_coordinates)
+            cell_x, cell_y = origin_cell_x, origin_cell_y
+
+            if direction_x > 0:
+                step_x = 1
+                one_unit_x = 1 / direction_x
+                x_distance = (cell_x + 1 - grid_origin_x) * one_unit_x
+            elif direction_x < 0:
+                step_x = -1
+                one_unit_x = -1 / direction_x
+                x_distance = (grid_origin_x - cell_x) * one_unit_x
+            else:
+                step_x = 0
+                one_unit_x = x_distance = float("inf")
+
+            if direction_y > 0:
+                step_y = 1
+                one_unit_y = 1 / direction_y
+                y_distance = (cell_y + 1 - grid_origin_y) * one_unit_y
+            elif direction_y < 0:
+                step_y = -1
+                one_unit_y = -1 / direction_y
+                y_distance = (grid_origin_y - cell_y) * one_unit_y
+            else:
+                step_y = 0
+                one_unit_y = y_distance = float("inf")
+
+            nearest_distance = None
+            nearest_wall = -1
+            nearest_x = nearest_y = nearest_ratio = 0
+
+            while True:
+                cell_walls = spatial_partitioning.get((cell_x, cell_y))
+                if cell_walls is not None:
+                    for wall_index in cell_walls:
+                        wall_start_x = walls_x1[wall_index]
+                        wall_start_y = walls_y1[wall_index]
+                        wall_vector_x = walls_dx[wall_index]
+                        wall_vector_y = walls_dy[wall_index]
+
+                        determinant = (
+                            direction_x * wall_vector_y - direction_y * wall_vector_x
+                        )
+                        # Parallel
+                        if determinant == 0:
+                            continue
+
+                        start_x = wall_start_x - origin_x
+                        start_y = wall_start_y - origin_y
+
+                        # Position on the ray and on the wall
+                        distance = (
+                            start_x * wall_vector_y - start_y * wall_vector_x
+                        ) / determinant
+                        if distance < -margin or distance > max_distance:
+                            continue
+                        ratio = (
+                            start_x * direction_y - start_y * direction_x
+                        ) / determinant
+                        if ratio < -margin or ratio > 1 + margin:
+                            continue
+
+                        hit_x = origin_x + distance * direction_x
+                        hit_y = origin_y + distance * direction_y
+
+                        # Check intersection point in current cell
+                        if (
+                            (
+                                cell_x == int((hit_x - margin) / cell_size)
+                                or cell_x + 1 == ceil((hit_x + margin) / cell_size)
+                            )
+                            and (
+                                cell_y == int((hit_y - margin) / cell_size)
+                                or cell_y + 1 == ceil((hit_y + margin) / cell_size)
+                            )
+                            and (
+                                nearest_distance is None
+                                or distance < nearest_distance
+                                # Ties go to the lowest wall index
+                                or (
+                                    distance == nearest_distance
+                                    and wall_index < nearest_wall
+                                )
+                            )
+                        ):
+                            # Nearest intersection
+                            nearest_distance = distance
+                            nearest_wall = wall_index
+                            nearest_x = hit_x
+                            nearest_y = hit_y
+                            nearest_ratio = ratio
 
-        intersection: IntersectionData = None
+                    if nearest_distance is not None:
+                        break
 
-        for coordinate in ray_line.get_coordinates(map_bounds=self.get_map_bounds()):
-            if coordinate not in self.spatial_partitioning:
-                continue
+                elif (
+                    cell_x // coarse_cell_size,
+                    cell_y // coarse_cell_size,
+                ) not in coarse_partitioning:
+                    # Empty coarse cell: jump to the cell where the ray leaves it
+                    coarse_x = cell_x // coarse_cell_size * coarse_cell_size
+                    coarse_y = cell_y // coarse_cell_size * coarse_cell_size
 
-            for wall_index in self.spatial_partitioning[coordinate]:
-                line: Line = self.walls[wall_index].get_line()
+                    # Distance of the last cell boundary crossed on each axis
+                    exit_x_distance = exit_y_distance = float("inf")
+                    if step_x != 0:
+                        if step_x == 1:
+                            exit_steps_x = coarse_x + coarse_cell_size - cell_x
+                        else:
+                            exit_steps_x = cell_x - coarse_x + 1
+                        exit_x_distance = x_distance + (exit_steps_x - 1) * one_unit_x
+                    if step_y != 0:
+                        if step_y == 1:
+                            exit_steps_y = coarse_y + coarse_cell_size - cell_y
+                        else:
+                            exit_steps_y = cell_y - coarse_y + 1
+                        exit_y_distance = y_distance + (exit_steps_y - 1) * one_unit_y
+
+                    # Same order as the DDA steps (y first on ties)
+                    if exit_x_distance < exit_y_distance:
+                        if y_distance <= exit_x_distance:
+                            steps_y = (
+                                floor((exit_x_distance - y_distance) / one_unit_y) + 1
+                            )
+                            cell_y += step_y * steps_y
+                            y_distance += steps_y * one_unit_y
+                        cell_x += step_x * exit_steps_x
+                        total_distance = exit_x_distance
+                        x_distance = exit_x_distance + one_unit_x
+                    else:
+                        if x_distance < exit_y_distance:
+                            steps_x = ceil((exit_y_distance - x_distance) / one_unit_x)
+                            cell_x += step_x * steps_x
+                            x_distance += steps_x * one_unit_x
+                        cell_y += step_y * exit_steps_y
+                        total_distance = exit_y_distance
+                        y_distance = exit_y_distance + one_unit_y
 
-                intersection_point = ray_line.get_intersection_segment(line)
-                if intersection_point is not None:
-                    # Check intersection point in current cell
                     if (
-                        coordinate[0] == int(intersection_point.x - self.margin)
-                        or coordinate[0] + 1 == ceil(intersection_point.x + self.margin)
-                    ) and (
-                        coordinate[1] == int(intersection_point.y - self.margin)
-                        or coordinate[1] + 1 == ceil(intersection_point.y + self.margin)
+                        total_distance > max_cells_distance
+                        or cell_x < min_cell_x
+                        or cell_x > max_cell_x
+                        or cell_y < min_cell_y
+                        or cell_y > max_cell_y
                     ):
-                        distance = distance_points(origin, intersection_point)
+                        break
+                    continue
 
-                        if intersection is None or distance < intersection["distance"]:
-                            # Nearest intersection
-                            intersection = {
-                                "intersection_point": intersection_point,
-                                "line_intersecting": line,
-                                "distance": distance,
-                                "wall_type": self.walls[wall_index].get_type(),
-                            }
+                # Next cell
+                if x_distance < y_distance:
+                    cell_x += step_x
+                    total_distance = x_distance
+                    x_distance += one_unit_x
+                else:
+                    cell_y += step_y
+                    total_distance = y_distance
+                    y_distance += one_unit_y
 
-            if intersection is not None:
-                break
+                if (
+                    total_distance > max_cells_distance
+                    or cell_x < min_cell_x
+                    or cell_x > max_cell_x
+                    or cell_y < min_cell_y
+                    or cell_y > max_cell_y
+                ):
+                    break
 
-        if intersection is not None:
-            ray.set_hit(
-                intersection["intersection_point"],
-                hit_infos=intersection,
-                distance=intersection["distance"],
+            if nearest_distance is not None:
+                hits["distances"][i] = max(0, nearest_distance)
+                hits["hit_x"][i] = nearest_x
+                hits["hit_y"][i] = nearest_y
+                hits["wall_indices"][i] = nearest_wall
+                hits["ratios"][i] = min(1, max(0, nearest_ratio))
+
+        return hits
+
+    def cast_rays_numpy(
+        self,
+        origin: Point,
+        directions: list[float],
+        direction_vectors: list[tuple[float, float]] | None,
+        hits: RaysHits,
+    ):
+        """cast_rays() with NumPy, same results as the DDA for origins on the map
+
+        Walls are tested in rings of growing distance from the origin, every
+        ray of a ring at once. A ray stops once its nearest hit is closer than
+        the next ring: the walls of the next rings are all farther
+        """
+        margin = self.margin
+        max_distance = MAX_RAY_DISTANCE + margin
+        origin_x, origin_y = origin.x, origin.y
+
+        # Views of the packed wall geometry (released at the end of the call,
+        # the arrays cannot be resized while viewed)
+        walls_x1 = numpy.frombuffer(self.walls_x1)
+        walls_y1 = numpy.frombuffer(self.walls_y1)
+        walls_dx = numpy.frombuffer(self.walls_dx)
+        walls_dy = numpy.frombuffer(self.walls_dy)
+        walls_length_squared = numpy.frombuffer(self.walls_length_squared)
+
+        # Distance from the origin to each wall
+        starts_x = walls_x1 - origin_x
+        starts_y = walls_y1 - origin_y
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            closest = numpy.nan_to_num(
+                -(starts_x * walls_dx + starts_y * walls_dy) / walls_length_squared
             )
+        closest = numpy.clip(closest, 0, 1)
+        walls_distances = numpy.hypot(
+            starts_x + closest * walls_dx, starts_y + closest * walls_dy
+        )
 
-        return ray
+        # Walls by distance, out of reach of every ray excluded
+        walls_order = numpy.argsort(walls_distances, kind="stable")
+        walls_order = walls_order[walls_distances[walls_order] <= max_distance]
+        walls_distances = walls_distances[walls_order]
+
+        if direction_vectors is not None:
+            rays_directions = numpy.array(direction_vectors, dtype=numpy.float64)
+            rays_x = rays_directions[:, 0].copy()
+            rays_y = rays_directions[:, 1].copy()
+        else:
+            angles = numpy.radians(numpy.array(directions, dtype=numpy.float64))
+            rays_x = numpy.cos(angles)
+            rays_y = numpy.sin(angles)
+
+        rays_quantity = len(directions)
+        distances = numpy.full(rays_quantity, numpy.inf)
+        wall_indices = numpy.full(rays_quantity, -1, dtype=numpy.int64)
+        ratios = numpy.zeros(rays_quantity)
+
+        rays = numpy.arange(rays_quantity)
+        ring_start = 0
+        ring_radius = RAYCASTING_NUMPY_FIRST_RING
+        while len(rays) > 0 and ring_start < len(walls_order):
+            ring_end = int(numpy.searchsorted(walls_distances, ring_radius, "right"))
+            ring_walls = walls_order[ring_start:ring_end]
+            ring_start = ring_end
+
+            if len(ring_walls) > 0:
+                self.cast_rays_numpy_walls(
+                    origin_x,
+                    origin_y,
+                    rays,
+                    rays_x,
+                    rays_y,
+                    ring_walls,
+                    distances,
+                    wall_indices,
+                    ratios,
+                )
+
+            # Rays with a hit in the ring are done
+            rays = rays[distances[rays] > ring_radius]
+            ring_radius *= 2
+
+        hit = wall_indices != -1
+        distances[~hit] = 0
+        hits_x = numpy.where(hit, origin_x + distances * rays_x, 0)
+        hits_y = numpy.where(hit, origin_y + distances * rays_y, 0)
+
+        hits["distances"] = array("d", numpy.maximum(distances, 0).tobytes())
+        hits["hit_x"] = array("d", hits_x.tobytes())
+        hits["hit_y"] = array("d", hits_y.tobytes())
+        hits["wall_indices"] = array("l", wall_indices.astype("l").tobytes())
+        hits["ratios"] = array("d", numpy.clip(ratios, 0, 1).tobytes())
+
+    def cast_rays_numpy_walls(
+        self,
+        origin_x: float,
+        origin_y: float,
+        rays: "numpy.ndarray",
+        rays_x: "numpy.ndarray",
+        rays_y: "numpy.ndarray",
+        walls: "numpy.ndarray",
+        distances: "numpy.ndarray",
+        wall_indices: "numpy.ndarray",
+        ratios: "numpy.ndarray",
+    ):
+        """Tests the rays (indices) against the walls (indices), the nearest
+        hits of the rays are updated in place
+        """
+        margin = self.margin
+        max_distance = MAX_RAY_DISTANCE + margin
+
+        walls_dx = numpy.frombuffer(self.walls_dx)[walls]
+        walls_dy = numpy.frombuffer(self.walls_dy)[walls]
+        starts_x = numpy.frombuffer(self.walls_x1)[walls] - origin_x
+        starts_y = numpy.frombuffer(self.walls_y1)[walls] - origin_y
+        # Position on the ray times the determinant, the same for every ray
+        distances_numerators = starts_x * walls_dy - starts_y * walls_dx
+
+        chunk_size = max(1, RAYCASTING_NUMPY_CHUNK_SIZE // len(walls))
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            for start in range(0, len(rays), chunk_size):
+                chunk = rays[start : start + chunk_size]
+                chunk_x = rays_x[chunk].reshape(-1, 1)
+                chunk_y = rays_y[chunk].reshape(-1, 1)
+
+                # Rays x walls
+                determinants = chunk_x * walls_dy - chunk_y * walls_dx
+                chunk_distances = distances_numerators / determinants
+                chunk_ratios = (starts_x * chunk_y - starts_y * chunk_x) / determinants
+
+                # Parallel walls give nan or inf, excluded by the comparisons
+                valid = (
+                    (chunk_distances >= -margin)
+                    & (chunk_distances <= max_distance)
+                    & (chunk_ratios >= -margin)
+                    & (chunk_ratios <= 1 + margin)
+                )
+                chunk_distances[~valid] = numpy.inf
+
+                nearest = numpy.argmin(chunk_distances, axis=1)
+                chunk_rays = numpy.arange(len(chunk))
+                nearest_distances = chunk_distances[chunk_rays, nearest]
+                nearest_walls = walls[nearest]
+
+                # Ties go to the lowest wall index
+                update = (nearest_distances < distances[chunk]) | (
+                    (nearest_distances == distances[chunk])
+                    & numpy.isfinite(nearest_distances)
+                    & (nearest_walls < wall_indices[chunk])
+                )
+                updated = chunk[update]
+                distances[updated] = nearest_distances[update]
+                wall_indices[updated] = nearest_walls[update]
+                ratios[updated] = chunk_ratios[chunk_rays, nearest][update]
@@ -0,0 +1,111 @@
+from array import array
+from math import isnan, nan
+
+from ..configuration import GAME_POSITION_HISTORY_SIZE
+from ..entities.Entity import Entity
+
+
+class PositionHistory:
+    """Ring buffer of the entities positions of the last ticks
+
+    Used by the server to test laser rays against the positions the shooter was
+    seeing (lag compensation), and by the client to display the other entities
+    between the snapshots received (interpolation). Buffers are allocated once
+    per tracked entity and reused, the memory does not grow with time
+    """
+
+    def __init__(self, size: int = GAME_POSITION_HISTORY_SIZE):
+        self.size = size
+        self.empty_buffer = array("d", [nan]) * self.size
+
+        # Timestamp of each recorded tick, index of the last one
+        self.timestamps = array("d", self.empty_buffer)
+        self.index = -1
+        self.count = 0
+
+        # (x, y) buffers by entity uid, nan before the entity was recorded
+        self.positions: dict[int, tuple[array, array]] = {}
+        # Buffers of the removed entities
+        self.free_positions: list[tuple[array, array]] = []
+
+    def record(self, timestamp: float, entities: dict[int, Entity]):
+        """Records the position of the entities at the timestamp"""
+        self.index = (self.index + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        self.timestamps[self.index] = timestamp
+
+        for uid in list(self.positions.keys()):
+            if uid not in entities:
+                self.free_positions.append(self.positions.pop(uid))
+
+        for uid, entity in entities.items():
+            buffers = self.positions.get(uid)
+            if buffers is None:
+                if len(self.free_positions) > 0:
+                    buffers = self.free_positions.pop()
+                    # Unknown before this tick
+                    buffers[0][:] = self.empty_buffer
+                    buffers[1][:] = self.empty_buffer
+                else:
+                    buffers = (
+                        array("d", self.empty_buffer),
+                        array("d", self.empty_buffer),
+                    )
+                self.positions[uid] = buffers
+            buffers[0][self.index] = entity.position.x
+            buffers[1][self.index] = entity.position.y
+
+    def get_last_timestamp(self) -> float | None:
+        return self.timestamps[self.index] if self.count > 0 else None
+
+    def get_tracked_entities(self) -> list[int]:
+        return list(self.positions.keys())
+
+    def get_position(
+        self, uid: int, timestamp: float, max_extrapolation: float = 0
+    ) -> tuple[float, float] | None:
+        """Position of the entity at the timestamp, interpolated between ticks
+
+        After the last tick the movement is extrapolated for max_extrapolation
+        seconds at most. Clamped to the oldest recorded position, None if the
+        entity is not tracked
+        """
+        buffers = self.positions.get(uid)
+        if buffers is None or self.count == 0:
+            return None
+        xs, ys = buffers
+
+        # From the last tick to the oldest one
+        newer = self.index
+        if timestamp >= self.timestamps[newer]:
+            older = (self.index - 1) % self.size
+            if (
+                max_extrapolation <= 0
+                or self.count < 2
+                or isnan(xs[older])
+                or self.timestamps[older] >= self.timestamps[newer]
+            ):
+                return xs[newer], ys[newer]
+            timestamp = min(timestamp, self.timestamps[newer] + max_extrapolation)
+            ratio = (timestamp - self.timestamps[older]) / (
+                self.timestamps[newer] - self.timestamps[older]
+            )
+            return (
+                xs[older] + (xs[newer] - xs[older]) * ratio,
+                ys[older] + (ys[newer] - ys[older]) * ratio,
+            )
+        for i in range(1, self.count):
+            older = (self.index - i) % self.size
+            if isnan(xs[older]):
+                # Not recorded yet at that time
+                break
+            if self.timestamps[older] <= timestamp:
+                ratio = (timestamp - self.timestamps[older]) / (
+                    self.timestamps[newer] - self.timestamps[older]
+                )
+                return (
+                    xs[older] + (xs[newer] - xs[older]) * ratio,
+                    ys[older] + (ys[newer] - ys[older]) * ratio,
+                )
+            newer = older
+        return xs[newer], ys[newer]
@@ -1,7 +1,14 @@
 from math import atan
 from threading import Lock
 
-from ..configuration import GAME_WORLD_FILE, VARIABLES
+from ..configuration import (
+    CLIENT_MAX_EXTRAPOLATION,
+    CLIENT_REPLAY_DELTA_TIME_NAME,
+    GAME_WORLD_FILE,
+    SERVER_MAX_REWIND,
+    SERVER_REWIND_PLAYER_SPEED,
+    VARIABLES,
+)
 from ..entities.create_entity import create_entity
 from ..entities.GameEntity import GameEntity
 from ..entities.LaserRay import LaserRay
@@ -12,10 +19,13 @@ from ..game.Ray import Ray
 from ..math.Circle import Circle
 from ..math.degrees_radians import radians_to_degrees
 from ..math.Point import Point
-from ..math.rotations import get_angle, rotate
+from ..math.rotations import get_angle, get_rotation_vector, rotate, rotate_vector
 from ..utils.DeltaTime import DeltaTime
+from .EntityGrid import EntityGrid
+from .EntityStore import EntityStore
 from .load_world import load_world
 from .Map import Map
+from .PositionHistory import PositionHistory
 from .Team import Team
 
 
@@ -24,9 +34,20 @@ class World:
 
     def __init__(self):
         self.map = Map()
-        self.entities: dict[int, GameEntity] = {}
+        self.entities = EntityStore()
+        # Spatial partitioning of entities for laser rays collisions
+        self.entity_grid = EntityGrid()
+        # Players positions of the last ticks, for the laser rays lag compensation
+        self.position_history = PositionHistory()
+
+        # Rays angles relative to the entity rotation, for a rays quantity and fov
+        self.rays_angles_settings = None
+        self.rays_angles: list[float] = []
+        self.rays_angles_vectors: list[tuple[float, float]] = []
 
         self.controlled_entity = None
+        # Players out of the area of interest, only known by their scoreboard entry
+        self.scoreboard_players: dict[int, Player] = {}
 
         self.current_uid = 0
         self.uid_mutex = Lock()
@@ -37,9 +58,24 @@ class World:
         return f"{self.entities}"
 
     def set_state(self, parsed_object):
-        self.entities.clear()
         try:
+            for key in list(self.entities.keys()):
+                if key not in parsed_object:
+                    del self.entities[key]
+
             for key in parsed_object:
+                entity = self.entities.get(key)
+                if (
+                    entity is not None
+                    and type(entity).__name__ == parsed_object[key][0]
+                ):
+                    # Update the existing entity in place
+                    try:
+                        entity.set_state(parsed_object[key][1:])
+                        continue
+                    except:
+                        pass
+
                 new_entity = create_entity(parsed_object[key])
                 if new_entity is not None:
                     # Specific case for LaserRay
@@ -47,15 +83,48 @@ class World:
                         new_entity.get_entity_fct = self.get_entity
 
                     self.entities[key] = new_entity
+                else:
+                    self.entities.pop(key, None)
         except Exception as e:
             if VARIABLES.debug:
                 print("Error setting world state", e)
 
+    def set_scoreboard_state(self, parsed_object: dict[int, list]):
+        """Updates the players out of the area of interest from their parsed
+        scoreboard entries (team, score, eliminations, deaths, name)
+        """
+        try:
+            for uid in list(self.scoreboard_players.keys()):
+                if uid not in parsed_object:
+                    del self.scoreboard_players[uid]
+
+            for uid, entry in parsed_object.items():
+                player = self.scoreboard_players.get(uid)
+                if player is None:
+                    player = Player(Point(0, 0))
+                    self.scoreboard_players[uid] = player
+                player.team = Team(entry[0])
+                player.score = float(entry[1])
+                player.eliminations = int(entry[2])
+                player.deaths = int(entry[3])
+                player.set_name(str(entry[4]))
+        except Exception as e:
+            if VARIABLES.debug:
+                print("Error setting scoreboard state", e)
+
+    def get_scoreboard_players(self) -> list[Player]:
+        """Players out of the area of interest (not in the entities)"""
+        return [
+            player
+            for uid, player in self.scoreboard_players.items()
+            if uid not in self.entities
+        ]
+
     def load_world(self, world_file):
         world_data = load_world(world_file)
 
         self.map.set_walls(world_data["walls"])
-        self.entities = {}
+        self.entities = EntityStore()
         for entity in world_data["entities"]:
             self.spawn_entity(entity)
 
@@ -98,10 +167,29 @@ class World:
 
     def reset_teams(self, teams: list[Team]):
         index = 0
-        for entity in self.entities.values():
-            if isinstance(entity, Player):
-                entity.team = teams[index % len(teams)]
-                index += 1
+        for entity in self.entities.get_entities(Player).values():
+            entity.team = teams[index % len(teams)]
+            index += 1
+
+    def record_positions(self, timestamp: float):
+        """Records the players positions at the end of a server tick"""
+        self.position_history.record(timestamp, self.entities.get_entities(Player))
+
+    def get_interpolated_positions(self, timestamp: float | None) -> dict[int, Point]:
+        """Positions of the other players at the server timestamp, interpolated
+        between the snapshots received
+        """
+        positions = {}
+        if timestamp is None:
+            return positions
+        for uid in self.position_history.get_tracked_entities():
+            if uid != self.controlled_entity:
+                position = self.position_history.get_position(
+                    uid, timestamp, CLIENT_MAX_EXTRAPOLATION
+                )
+                if position is not None:
+                    positions[uid] = Point(*position)
+        return positions
 
     def get_current_position(self) -> Point | None:
         entity = self.get_entity(self.controlled_entity)
@@ -139,18 +227,180 @@ class World:
                 )
             )
 
+    def set_movement_state(
+        self, entity: GameEntity, events: list[EventInstance], start: int
+    ):
+        """Sets the movement state of the entity from the events of one tick (from
+        start to the next TICK event)
+        """
+        is_moving = False
+        is_running = False
+
+        for i in range(start, len(events)):
+            match events[i].id:
+                case Event.TICK:
+                    break
+                case Event.GAME_RUN:
+                    is_running = True
+                case Event.GAME_MOVE:
+                    is_moving = True
+
+        entity.is_moving = is_moving
+        entity.is_running = is_moving and is_running
+        entity.is_crouching = False
+
+    def update_controlled_entity(
+        self,
+        uid,
+        events: list[EventInstance],
+        delta_time=DeltaTime(),
+        player_delta_time: DeltaTime = None,
+        player_time_offset: float = None,
+        replay=False,
+    ) -> GameEntity | None:
+        """Applies the player events to the controlled entity
+
+        In replay mode the events were already applied once, only the movement is
+        applied again (client-side prediction)
+        """
+        current_entity = self.get_entity(uid)
+        if current_entity is None:
+            return None
+
+        # Asynchronous mode (used by the server to process events in the past)
+        async_mode = player_delta_time is not None
+        player_delta_time = delta_time if not async_mode else player_delta_time
+
+        current_entity.holding_restart = False
+        self.set_movement_state(current_entity, events, 0)
+
+        for i, event in enumerate(events):
+            match event.id:
+                case Event.TICK:
+                    # Synchonize delta time for each tick
+                    if async_mode:
+                        player_delta_time.update(event.timestamp)
+                    # Events received together may span several ticks
+                    self.set_movement_state(current_entity, events, i + 1)
+                case Event.GAME_CROUCH:
+                    current_entity.is_crouching = True
+                    current_entity.is_running = False
+                case Event.GAME_ROTATE:
+                    if (
+                        isinstance(event.data, list)
+                        and len(event.data) == 2
+                        and isinstance(event.data[0], (float, int))
+                    ):
+                        current_entity.rotation = event.data[0] % 360
+                case Event.GAME_MOVE:
+                    if isinstance(event.data, (float, int)):
+                        self.move_entity(
+                            current_entity,
+                            rotate(
+                                current_entity.move_speed
+                                * (
+                                    current_entity.run_speed_multiplier
+                                    if current_entity.is_running
+                                    else 1
+                                )
+                                * (
+                                    current_entity.crouch_speed_multiplier
+                                    if current_entity.is_crouching
+                                    else 1
+                                )
+                                * player_delta_time.get_dt_target(),
+                                current_entity.rotation + event.data,
+                            ),
+                        )
+                case Event.GAME_SHOOT:
+                    if replay:
+                        # Laser rays are not predicted
+                        continue
+                    current_entity.holding_restart = True
+
+                    if current_entity.attack():
+                        ray = self.map.cast_ray(
+                            current_entity.position,
+                            (current_entity.rotation) % 360,
+                        )
+                        end_position = current_entity.position
+                        if ray.hit_point is not None:
+                            end_position = ray.hit_point
+
+                        laser_ray = LaserRay(
+                            Point(current_entity.position.x, current_entity.position.y),
+                            end_position,
+                            uid,
+                        )
+                        laser_ray.rotation = current_entity.rotation
+                        laser_ray.team = current_entity.team
+                        laser_ray.damages = current_entity.damages
+                        laser_ray.get_entity_fct = self.get_entity
+                        if async_mode and player_time_offset is not None:
+                            # Targets where the player was seeing them, the event
+                            # data is the interpolation delay of the player
+                            view_delay = (
+                                event.data
+                                if isinstance(event.data, (float, int))
+                                else 0
+                            )
+                            laser_ray.rewind_time = min(
+                                SERVER_MAX_REWIND,
+                                max(
+                                    0,
+                                    delta_time.current_time
+                                    - (event.timestamp + player_time_offset)
+                                    + view_delay,
+                                ),
+                            )
+                        self.spawn_entity(laser_ray)
+
+        return current_entity
+
+    def replay_inputs(self, inputs: list[list[EventInstance]], timestamp: float):
+        """Applies the inputs not processed by the server yet on top of its state
+
+        Inputs are timed by their TICK events like on the server, from the
+        timestamp of the last input processed
+        """
+        current_entity = self.get_entity(self.controlled_entity)
+        if current_entity is None:
+            return
+
+        # The rotation is controlled by the client
+        rotation = current_entity.rotation
+
+        replay_delta_time = DeltaTime(CLIENT_REPLAY_DELTA_TIME_NAME)
+        replay_delta_time.reset(timestamp)
+        for events in inputs:
+            self.update_controlled_entity(
+                self.controlled_entity,
+                events,
+                player_delta_time=replay_delta_time,
+                replay=True,
+            )
+
+        current_entity.rotation = rotation
+
     def update(
         self,
         events: list[EventInstance],
         controlled_entity_id=None,
         delta_time=DeltaTime(),
         player_delta_time: DeltaTime = None,
+        player_time_offset: float = None,
     ):
         if self.controlled_entity is not None or controlled_entity_id is not None:
-            current_entity = (
-                self.get_entity(self.controlled_entity)
-                if self.controlled_entity is not None
-                else self.get_entity(controlled_entity_id)
+            current_entity = self.update_controlled_entity(
+                (
+                    self.controlled_entity
+                    if self.controlled_entity is not None
+                    else controlled_entity_id
+                ),
+                events,
+                delta_time,
+                player_delta_time,
+                player_time_offset,
             )
 
             if current_entity is None:
@@ -158,103 +408,19 @@ class World:
                     print("Invalid controlled entity")
                 return
 
-            # Asynchronous mode (used by the server to process events in the past)
-            async_mode = player_delta_time is not None
-            player_delta_time = delta_time if not async_mode else player_delta_time
-
-            is_moving = False
-            is_running = False
-
-            for event in events:
-                match event.id:
-                    case Event.GAME_RUN:
-                        is_running = True
-                    case Event.GAME_MOVE:
-                        is_moving = True
-
-            current_entity.is_moving = is_moving
-            current_entity.is_running = is_moving and is_running
-            current_entity.is_crouching = False
-            current_entity.holding_restart = False
-
-            for event in events:
-                match event.id:
-                    case Event.TICK:
-                        # Synchonize delta time for each tick
-                        if async_mode:
-                            player_delta_time.update(event.timestamp)
-                    case Event.GAME_CROUCH:
-                        current_entity.is_crouching = True
-                        current_entity.is_running = False
-                    case Event.GAME_ROTATE:
-                        if (
-                            isinstance(event.data, list)
-                            and len(event.data) == 2
-                            and isinstance(event.data[0], (float, int))
-                        ):
-                            current_entity.rotation = event.data[0] % 360
-                    case Event.GAME_MOVE:
-                        if isinstance(event.data, (float, int)):
-                            self.move_entity(
-                                current_entity,
-                                rotate(
-                                    current_entity.move_speed
-                                    * (
-                                        current_entity.run_speed_multiplier
-                                        if current_entity.is_running
-                                        else 1
-                                    )
-                                    * (
-                                        current_entity.crouch_speed_multiplier
-                                        if current_entity.is_crouching
-                                        else 1
-                                    )
-                                    * player_delta_time.get_dt_target(),
-                                    current_entity.rotation + event.data,
-                                ),
-                            )
-                    case Event.GAME_SHOOT:
-                        current_entity.holding_restart = True
-
-                        if current_entity.attack():
-                            ray = self.map.cast_ray(
-                                current_entity.position,
-                                (current_entity.rotation) % 360,
-                            )
-                            end_position = current_entity.position
-                            if ray.hit_point is not None:
-                                end_position = ray.hit_point
-
-                            laser_ray = LaserRay(
-                                Point(
-                                    current_entity.position.x, current_entity.position.y
-                                ),
-                                end_position,
-                                (
-                                    self.controlled_entity
-                                    if self.controlled_entity is not None
-                                    else controlled_entity_id
-                                ),
-                            )
-                            laser_ray.rotation = current_entity.rotation
-                            laser_ray.team = current_entity.team
-                            laser_ray.damages = current_entity.damages
-                            laser_ray.get_entity_fct = self.get_entity
-                            self.spawn_entity(laser_ray)
-
             # The player is shooting if there is a laser ray with his id
             current_entity.is_shooting = False
-            for entity in self.entities.values():
-                if isinstance(entity, LaserRay):
-                    if entity.parent_id == (
-                        self.controlled_entity
-                        if self.controlled_entity is not None
-                        else controlled_entity_id
-                    ):
-                        current_entity.is_shooting = True
-                        break
+            for entity in self.entities.get_entities(LaserRay).values():
+                if entity.parent_id == (
+                    self.controlled_entity
+                    if self.controlled_entity is not None
+                    else controlled_entity_id
+                ):
+                    current_entity.is_shooting = True
+                    break
 
             # Update other entities
+            entity_grid_updated = False
             for key in list(self.entities.keys()):
                 entity = self.get_entity(key)
                 if entity is None:
@@ -268,8 +434,17 @@ class World:
                 if isinstance(entity, LaserRay):
                     # Collision with entities
                     if entity.can_attack:
+                        if not entity_grid_updated:
+                            self.entity_grid.update(self.entities)
+                            entity_grid_updated = True
+
                         has_attacked = False
-                        for key_target in list(self.entities.keys()):
+                        # Only entities in the cells crossed by the laser ray,
+                        # or near enough to have been crossed before the rewind
+                        targets = self.entity_grid.get_entities_on_line(
+                            entity.ray, entity.rewind_time * SERVER_REWIND_PLAYER_SPEED
+                        )
+                        for key_target in targets:
                             entity_target = self.get_entity(key_target)
                             # Target is not the laser ray nor its parent
                             if (
@@ -284,9 +459,24 @@ class World:
                                 or entity_target.team == Team.NONE
                             ):
                                 # Collision with the target
+                                target_position = None
+                                if entity.rewind_time > 0:
+                                    target_position = (
+                                        self.position_history.get_position(
+                                            key_target,
+                                            delta_time.current_time
+                                            - entity.rewind_time,
+                                        )
+                                    )
                                 if (
                                     entity_target.check_can_be_attacked()
-                                    and entity.collides_with(entity_target)
+                                    and (
+                                        entity.collides_with(entity_target)
+                                        if target_position is None
+                                        else entity.collides_with_position(
+                                            entity_target, Point(*target_position)
+                                        )
+                                    )
                                     and entity.attack()
                                 ):
                                     has_attacked = True
@@ -305,56 +495,80 @@ class World:
                         entity.death()
 
     def move_entity(self, entity: GameEntity, movement_vector: Point) -> bool:
-        new_entity_position = Point(entity.position.x, entity.position.y)
+        new_x = entity.position.x
+        new_y = entity.position.y
         collision = False
 
-        # X
-        moved_collider_x = Circle(
+        # X (the moved collider is reused for Y)
+        moved_collider = Circle(
             Point(
                 entity.collider.origin.x + movement_vector.x, entity.collider.origin.y
             ),
             entity.collider.radius,
         )
 
-        if not self.map.collides_with(moved_collider_x):
-            new_entity_position.x += movement_vector.x
+        if not self.map.collides_with(moved_collider):
+            new_x += movement_vector.x
         else:
             collision = True
 
         # Y
-        moved_collider_y = Circle(
-            Point(
-                entity.collider.origin.x, entity.collider.origin.y + movement_vector.y
-            ),
-            entity.collider.radius,
-        )
+        moved_collider.origin.x = entity.collider.origin.x
+        moved_collider.origin.y = entity.collider.origin.y + movement_vector.y
 
-        if not self.map.collides_with(moved_collider_y):
-            new_entity_position.y += movement_vector.y
+        if not self.map.collides_with(moved_collider):
+            new_y += movement_vector.y
         else:
             collision = True
 
-        entity.move(new_entity_position.x, new_entity_position.y)
+        entity.move(new_x, new_y)
 
         return collision
 
+    def update_rays_angles(self):
+        """Computes the rays angles when the rays quantity or the fov changes"""
+        settings = (VARIABLES.rays_quantity, VARIABLES.fov)
+        if settings == self.rays_angles_settings:
+            return
+        self.rays_angles_settings = settings
+
+        self.rays_angles = []
+        for i in range(VARIABLES.rays_quantity):
+            # Even ray distribution
+            normalized_distance = i / VARIABLES.rays_quantity * 2 - 1  # -1 to 1
+            ray_rotation = radians_to_degrees(atan(normalized_distance))
+            self.rays_angles.append(ray_rotation / 90 * VARIABLES.fov)
+
+        self.rays_angles_vectors = [
+            get_rotation_vector(ray_rotation) for ray_rotation in self.rays_angles
+        ]
+
     def cast_rays(self) -> list[tuple[int, Ray]]:
         rays: list[tuple[int, Ray]] = []
 
         entity = self.get_entity(self.controlled_entity)
 
         if entity is not None:
+            self.update_rays_angles()
+
+            directions = [
+                (entity.rotation + ray_rotation) % 360
+                for ray_rotation in self.rays_angles
+            ]
+
+            # Rays angles rotated by the entity rotation (angle addition)
+            rotation_vector = get_rotation_vector(entity.rotation)
+            direction_vectors = [
+                rotate_vector(angle_vector, rotation_vector)
+                for angle_vector in self.rays_angles_vectors
+            ]
+
+            hits = self.map.cast_rays(entity.position, directions, direction_vectors)
+
             for i in range(VARIABLES.rays_quantity):
-                # Even ray distribution
-                normalized_distance = i / VARIABLES.rays_quantity * 2 - 1  # -1 to 1
-                ray_rotation = radians_to_degrees(atan(normalized_distance))
-                ray_rotation = ray_rotation / 90 * VARIABLES.fov
-
-                ray = self.map.cast_ray(
-                    entity.position,
-                    (entity.rotation + ray_rotation) % 360,
-                )
-                if ray.distance != 0:
-                    rays.append((i, ray))
+                if hits["distances"][i] != 0:
+                    rays.append(
+                        (i, self.map.get_ray(entity.position, directions[i], hits, i))
+                    )
 
         return rays
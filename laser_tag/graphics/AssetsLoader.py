@@ -48,6 +48,10 @@ def load_textures(path):
     textures.load_texture(TextureNames.BLACK, path.joinpath("black.jpg"), keep=False)
     textures.load_texture(TextureNames.WHITE, path.joinpath("white.jpg"), keep=False)
 
+    # Team colors are never created during the game
+    for texture_name in TextureNames:
+        textures.load_teams(texture_name)
+
 
 def open_assets_folder():
     if platform == "win32":
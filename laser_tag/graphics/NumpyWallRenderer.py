@@ -0,0 +1,227 @@
+import pygame
+
+from ..configuration import WALL_SHADING_LEVELS
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class NumpyWallRenderer:
+    """Walls drawn directly in the pixels of a surface with NumPy
+
+    Alternative to blitting the columns one by one: the textures and their
+    darkened variants are stored once in an array of mapped colors, then the
+    texel of every pixel of the frame is gathered at once. NumPy is an optional
+    dependency, see is_available
+    """
+
+    def __init__(self):
+        # Mapped colors: sky and ground (no wall), then every shading level of
+        # each texture. Every column of the textures is stored between the sky
+        # and the ground colors, pixels above and below the walls use them
+        self.texels = None
+        # Texture surfaces and their (offset, width, height) in the texels
+        self.textures_surfaces: dict = {}
+        self.textures_offsets: dict = {}
+        self.texels_format = None
+
+        # Buffers reused while the surface size does not change
+        self.buffers_size = None
+
+    @staticmethod
+    def is_available() -> bool:
+        return numpy is not None
+
+    def get_mapped_colors(self, surface: pygame.Surface, colors) -> "numpy.ndarray":
+        """Colors (array of r, g, b) as opaque pixels of the surface"""
+        shifts = surface.get_shifts()
+        colors = colors.astype(numpy.uint32)
+        return (
+            (colors[..., 0] << shifts[0])
+            | (colors[..., 1] << shifts[1])
+            | (colors[..., 2] << shifts[2])
+            | numpy.uint32(surface.get_masks()[3])
+        )
+
+    def load_textures(
+        self,
+        surface: pygame.Surface,
+        textures: dict,
+        sky_color: tuple[int, int, int],
+        ground_color: tuple[int, int, int],
+    ):
+        """Builds the texels when the textures or the surface format changed"""
+        texels_format = (
+            surface.get_shifts(),
+            surface.get_masks(),
+            sky_color,
+            ground_color,
+        )
+        if (
+            texels_format == self.texels_format
+            and textures.keys() == self.textures_surfaces.keys()
+            and all(
+                textures[id] is self.textures_surfaces[id] for id in textures.keys()
+            )
+        ):
+            return
+
+        sky, ground = self.get_mapped_colors(
+            surface, numpy.array([sky_color, ground_color])
+        )
+        texels = [numpy.array([sky, ground], numpy.uint32)]
+        self.textures_offsets = {}
+        offset = 2
+        for id, texture in textures.items():
+            width, height = texture.get_size()
+            self.textures_offsets[id] = (offset, width, height)
+            # Same darkening as the columns of the textures
+            for shading_level in range(WALL_SHADING_LEVELS):
+                variant = texture.copy()
+                if shading_level > 0:
+                    brightness = round(
+                        255 * (1 - shading_level / (WALL_SHADING_LEVELS - 1))
+                    )
+                    variant.fill(
+                        (brightness, brightness, brightness),
+                        special_flags=pygame.BLEND_RGB_MULT,
+                    )
+                columns = numpy.empty((width, height + 2), numpy.uint32)
+                columns[:, 0] = sky
+                columns[:, 1:-1] = self.get_mapped_colors(
+                    surface, pygame.surfarray.array3d(variant)
+                )
+                columns[:, -1] = ground
+                texels.append(columns.reshape(-1))
+            offset += width * (height + 2) * WALL_SHADING_LEVELS
+
+        self.texels = numpy.concatenate(texels)
+        self.textures_surfaces = dict(textures)
+        self.texels_format = texels_format
+
+    def allocate_buffers(self, width: int, height: int):
+        if self.buffers_size == (width, height):
+            return
+        self.buffers_size = (width, height)
+
+        self.rows = numpy.arange(height, dtype=numpy.float32).reshape(-1, 1)
+        self.texels_rows = numpy.empty((height, width), numpy.float32)
+        self.indexes = numpy.empty((height, width), numpy.intp)
+
+    def render(
+        self,
+        surface: pygame.Surface,
+        textures: dict,
+        walls: list[tuple],
+        rays_quantity: int,
+        ray_width: float,
+        sky_color: tuple[int, int, int],
+        ground_color: tuple[int, int, int],
+    ):
+        """Draws the walls, the sky and the ground on the whole surface
+
+        The horizon is at the middle of the surface
+
+        Parameters:
+            surface (pygame.Surface): Surface of the world (32 bits)
+            textures (dict): Walls textures surfaces by id
+            walls (list): (ray index, texture id, ratio, display size,
+                flipped, darkness) of each ray hitting a wall, display size and
+                darkness as in Texture.get_column
+            rays_quantity (int): Number of rays
+            ray_width (float): Width of a ray (1080p)
+            sky_color (tuple): Color of the sky
+            ground_color (tuple): Color of the ground
+        """
+        width, height = surface.get_size()
+        if width == 0 or height == 0 or rays_quantity == 0:
+            return
+        self.allocate_buffers(width, height)
+        self.load_textures(surface, textures, sky_color, ground_color)
+
+        # Rays without wall: no texture, sky above the horizon and ground below
+        rays_offsets = numpy.zeros(rays_quantity, numpy.intp)
+        rays_texture_widths = numpy.ones(rays_quantity, numpy.intp)
+        rays_texture_heights = numpy.zeros(rays_quantity, numpy.intp)
+        rays_display_sizes = numpy.zeros(rays_quantity, numpy.float32)
+        rays_ratios = numpy.zeros(rays_quantity, numpy.float32)
+        rays_flipped = numpy.zeros(rays_quantity, bool)
+        rays_shading_levels = numpy.zeros(rays_quantity, numpy.intp)
+
+        walls = [wall for wall in walls if 0 <= wall[0] < rays_quantity and wall[3] > 0]
+        if len(walls) > 0:
+            indexes, texture_ids, ratios, display_sizes, flipped, darkness = zip(*walls)
+            indexes = numpy.array(indexes, numpy.intp)
+            offsets, texture_widths, texture_heights = zip(
+                *(self.textures_offsets[texture_id] for texture_id in texture_ids)
+            )
+            rays_offsets[indexes] = offsets
+            rays_texture_widths[indexes] = texture_widths
+            rays_texture_heights[indexes] = texture_heights
+            rays_display_sizes[indexes] = display_sizes
+            rays_ratios[indexes] = ratios
+            rays_flipped[indexes] = flipped
+            # Same quantization as Texture.get_column
+            rays_shading_levels[indexes] = numpy.rint(
+                numpy.clip(darkness, 0, 255) / 255 * (WALL_SHADING_LEVELS - 1)
+            )
+
+        # Part of the texture displayed by each ray, as in Texture.get_column
+        hit = rays_display_sizes > 0
+        rays_columns = numpy.ones(rays_quantity, numpy.intp)
+        rays_columns[hit] = numpy.minimum(
+            numpy.ceil(ray_width * rays_texture_heights[hit] / rays_display_sizes[hit]),
+            rays_texture_widths[hit],
+        )
+        rays_x = numpy.minimum(
+            (rays_texture_widths * rays_ratios).astype(numpy.intp),
+            rays_texture_widths - rays_columns,
+        )
+        rays_offsets += (
+            rays_shading_levels * rays_texture_widths * (rays_texture_heights + 2)
+        )
+
+        # Texture column and vertical scale of every column of pixels
+        columns = numpy.arange(width, dtype=numpy.float32) * (1920 / width / ray_width)
+        columns_rays = numpy.minimum(columns.astype(numpy.intp), rays_quantity - 1)
+        columns_texture_x = numpy.minimum(
+            ((columns - columns_rays) * rays_columns[columns_rays]).astype(numpy.intp),
+            rays_columns[columns_rays] - 1,
+        )
+        columns_texture_x = numpy.where(
+            rays_flipped[columns_rays],
+            rays_columns[columns_rays] - 1 - columns_texture_x,
+            columns_texture_x,
+        )
+        columns_texture_heights = rays_texture_heights[columns_rays]
+        columns_offsets = rays_offsets[columns_rays] + (
+            rays_x[columns_rays] + columns_texture_x
+        ) * (columns_texture_heights + 2)
+        # Walls without height still separate the sky from the ground
+        columns_heights = numpy.maximum(
+            rays_display_sizes[columns_rays] * (height / 1080), 1e-3
+        )
+        # Same types as the buffers, mixed types are much slower
+        columns_scales = (
+            numpy.maximum(columns_texture_heights, 1) / columns_heights
+        ).astype(numpy.float32)
+        columns_starts = (1 - (height - columns_heights) / 2 * columns_scales).astype(
+            numpy.float32
+        )
+        columns_ends = (columns_texture_heights + 1).astype(numpy.float32)
+
+        # Row in the stored column of every pixel: 0 for the sky above the
+        # wall, 1 to the texture height for the wall, then the ground
+        numpy.multiply(self.rows, columns_scales, out=self.texels_rows)
+        numpy.add(self.texels_rows, columns_starts, out=self.texels_rows)
+        numpy.maximum(self.texels_rows, 0, out=self.texels_rows)
+        numpy.minimum(self.texels_rows, columns_ends, out=self.texels_rows)
+        numpy.copyto(self.indexes, self.texels_rows, casting="unsafe")
+        numpy.add(self.indexes, columns_offsets, out=self.indexes)
+
+        pixels = pygame.surfarray.pixels2d(surface)
+        # Rows of the transposed pixels are contiguous
+        numpy.take(self.texels, self.indexes, out=pixels.T, mode="clip")
+        del pixels
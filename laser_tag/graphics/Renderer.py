@@ -107,8 +107,11 @@ class Renderer:
             rays = game.world.cast_rays()
             self.world.update(
                 rays,
-                game.world.entities.values(),
+                game.world.entities,
                 game.world.get_entity(game.world.controlled_entity),
+                game.world.get_interpolated_positions(
+                    game.get_interpolation_timestamp()
+                ),
             )
             if VARIABLES.show_minimap:
                 entity_list = []
@@ -322,11 +325,10 @@ class Renderer:
                 # Hold to restart
                 holding_player_count = 0
                 player_count = 0
-                for entity in game.world.entities.values():
-                    if isinstance(entity, Player):
-                        player_count += 1
-                        if entity.holding_restart:
-                            holding_player_count += 1
+                for entity in game.world.entities.get_entities(Player).values():
+                    player_count += 1
+                    if entity.holding_restart:
+                        holding_player_count += 1
                 hold_text = self.text.get_surface(
                     f"{self.language.get(LanguageKey.GAME_END_GAME_HOLD_TO_RESTART)} ({holding_player_count}/{player_count})",
                     50,
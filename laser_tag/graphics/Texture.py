@@ -1,6 +1,17 @@
+from collections import OrderedDict
+from math import ceil, exp, log
+
 import pygame
 
-from ..configuration import DEFAULT_TEXTURE_CACHE_LIMIT, MASK_COLOR, VARIABLES
+from ..configuration import (
+    DEFAULT_TEXTURE_CACHE_SIZE,
+    MASK_COLOR,
+    TEXTURE_CACHE_SIZE_PRECISION,
+    VARIABLES,
+    WALL_COLUMNS_CACHE_SIZE,
+    WALL_COLUMNS_HEIGHT_PRECISION,
+    WALL_SHADING_LEVELS,
+)
 from ..game.Team import Team, get_team_color
 from .resize import resize
 
@@ -9,9 +20,18 @@ class Texture:
     """Texture class that manages surfaces and caching"""
 
     def __init__(self, path, alpha: bool = False, custom_size: tuple[int, int] = None):
-        self.texture_cache = {}
-
-        self.cache_limit = DEFAULT_TEXTURE_CACHE_LIMIT
+        # Resized surfaces, least recently used first, and their size in bytes
+        self.texture_cache: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+        self.cache_size = 0
+        self.cache_limit = DEFAULT_TEXTURE_CACHE_SIZE
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Wall columns (scaled and flipped strips of the texture), least recently
+        # used first, and their size in bytes
+        self.columns_cache: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+        self.columns_cache_size = 0
+        self.columns_cache_limit = WALL_COLUMNS_CACHE_SIZE
 
         try:
             texture = pygame.image.load(path)
@@ -37,21 +57,58 @@ class Texture:
         self.resize()
 
     def resize(
-        self, size: tuple[float, float] = None, team: Team = None
+        self,
+        size: tuple[float, float] = None,
+        team: Team = None,
+        quantize: bool = False,
     ) -> pygame.Surface:
+        """Texture resized (1080p size)
+
+        Parameters:
+            size (tuple): Size of the texture, original size if None
+            team (Team): Team color of the texture
+            quantize (bool): Round the size so that close sizes share their
+                surface (sprites changing size every frame), exact below
+                1 / TEXTURE_CACHE_SIZE_PRECISION pixels
+        """
         if size is None:
             size = (self.original_width, self.original_height, team)
 
-        size = (int(resize(size[0], "x")), int(resize(size[1], "y")), team)
-
-        if size not in self.texture_cache:
-            self.texture_cache[size] = pygame.transform.scale(
-                self.get_original_surface(team), (size[0], size[1])
+        if quantize:
+            size = (
+                self.quantize_size(resize(size[0], "x")),
+                self.quantize_size(resize(size[1], "y")),
+                team,
             )
+        else:
+            size = (int(resize(size[0], "x")), int(resize(size[1], "y")), team)
+
+        surface = self.texture_cache.get(size)
+        if surface is not None:
+            self.texture_cache.move_to_end(size)
+            self.cache_hits += 1
+            return surface
+
+        self.cache_misses += 1
+        surface = pygame.transform.scale(
+            self.get_original_surface(team), (size[0], size[1])
+        )
+        self.texture_cache[size] = surface
+        self.cache_size += self.get_surface_size(surface)
+        self.reduce_cache()
 
-            self.reduce_cache()
+        return surface
 
-        return self.texture_cache[size]
+    @staticmethod
+    def quantize_size(size: float) -> int:
+        if size < 1 / TEXTURE_CACHE_SIZE_PRECISION:
+            return max(0, int(size))
+        return round(
+            exp(
+                round(log(size) / TEXTURE_CACHE_SIZE_PRECISION)
+                * TEXTURE_CACHE_SIZE_PRECISION
+            )
+        )
 
     def get_surface(self, team: Team = None) -> pygame.Surface:
         return self.resize(team=team)
@@ -63,19 +120,123 @@ class Texture:
 
         return self.origial_surfaces[team]
 
+    def load_teams(self):
+        """Creates the surface of every team (not during the game)"""
+        for team in Team:
+            self.get_original_surface(team)
+
     def get_original_size(self) -> tuple[int, int]:
         return self.original_width, self.original_height
 
     def reduce_cache(self):
-        if len(self.texture_cache) > self.cache_limit:
-            self.texture_cache = dict(
-                list(self.texture_cache.items())[-self.cache_limit :]
+        # The last surface is kept even if larger than the limit
+        while self.cache_size > self.cache_limit and len(self.texture_cache) > 1:
+            _, removed_surface = self.texture_cache.popitem(last=False)
+            self.cache_size -= self.get_surface_size(removed_surface)
+
+    def get_cache_stats(self) -> tuple[int, int]:
+        """Hits and misses of the resized textures cache"""
+        return self.cache_hits, self.cache_misses
+
+    def get_column(
+        self,
+        ratio: float,
+        display_size: float,
+        width: float,
+        flipped: bool = False,
+        darkness: float = 0,
+    ) -> pygame.Surface:
+        """Column of the texture displayed on a wall, cropped to the screen
+
+        Parameters:
+            ratio (float): Horizontal position in the texture (0 to 1)
+            display_size (float): Height of the wall (1080p)
+            width (float): Width of the column (1080p)
+            flipped (bool): Flip the column horizontally
+            darkness (float): Darkening of the column (0 to 255)
+        """
+        # Heights quantized so that close walls share their columns
+        height_bucket = round(
+            log(max(1, resize(display_size, "y"))) / WALL_COLUMNS_HEIGHT_PRECISION
+        )
+        height = int(exp(height_bucket * WALL_COLUMNS_HEIGHT_PRECISION))
+        screen_height = int(resize(1080, "y"))
+        column_width = ceil(resize(width, "x"))
+        # Pre-darkened variants, quantized to the shading levels
+        shading_level = round(
+            min(255, max(0, darkness)) / 255 * (WALL_SHADING_LEVELS - 1)
+        )
+
+        texture_size_ratio = self.original_height / display_size
+        texture_width = min(ceil(width * texture_size_ratio), self.original_width)
+        texture_x = min(
+            int(self.original_width * ratio), self.original_width - texture_width
+        )
+
+        key = (
+            texture_x,
+            texture_width,
+            height_bucket,
+            column_width,
+            screen_height,
+            flipped,
+            shading_level,
+        )
+        column = self.columns_cache.get(key)
+        if column is not None:
+            self.columns_cache.move_to_end(key)
+            return column
+
+        # Rows displayed on screen, the texture is cropped to the center
+        cropping_offset = 0
+        if display_size > 1080:
+            cropping_offset = int(
+                resize((display_size - 1080) / 2, "y") * texture_size_ratio
+            )
+        rows = self.original_height - cropping_offset * 2
+        visible_rows = rows * min(1, screen_height / max(1, height))
+
+        column = pygame.transform.scale(
+            self.get_original_surface().subsurface(
+                (
+                    texture_x,
+                    int(cropping_offset + (rows - visible_rows) / 2),
+                    texture_width,
+                    max(1, round(visible_rows)),
+                )
+            ),
+            (column_width, min(height, screen_height)),
+        )
+        if flipped:
+            column = pygame.transform.flip(column, True, False)
+        if shading_level > 0:
+            brightness = round(255 * (1 - shading_level / (WALL_SHADING_LEVELS - 1)))
+            column.fill(
+                (brightness, brightness, brightness),
+                special_flags=pygame.BLEND_RGB_MULT,
             )
 
+        self.columns_cache[key] = column
+        self.columns_cache_size += self.get_surface_size(column)
+        while self.columns_cache_size > self.columns_cache_limit:
+            _, removed_column = self.columns_cache.popitem(last=False)
+            self.columns_cache_size -= self.get_surface_size(removed_column)
+
+        return column
+
+    @staticmethod
+    def get_surface_size(surface: pygame.Surface) -> int:
+        """Size of the surface pixels in bytes"""
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
     def clear_cache(self):
         self.texture_cache.clear()
+        self.cache_size = 0
+        self.columns_cache.clear()
+        self.columns_cache_size = 0
 
     def set_cache_limit(self, limit: int):
+        """Size of the resized textures cache in bytes"""
         self.cache_limit = limit
         self.reduce_cache()
 
@@ -88,7 +249,7 @@ class Texture:
 
         mask = pygame.mask.from_threshold(surface, mask_color, (1, 1, 1))
 
-        for y in range(surface.get_height()):
-            for x in range(surface.get_width()):
-                if mask.get_at((x, y)):
-                    surface.set_at((x, y), team_color)
+        # Only the pixels of the mask color are drawn
+        mask.to_surface(surface, setcolor=team_color, unsetcolor=None)
+
+        return surface
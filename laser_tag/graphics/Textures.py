@@ -28,10 +28,17 @@ class Textures:
         if id not in self.textures or not keep:
             self.textures[id] = Texture(path, alpha, custom_size)
 
+    def load_teams(self, id):
+        self.textures[id].load_teams()
+
     def resize_texture(
-        self, id, size: tuple[float, float] = None, team: Team = None
+        self,
+        id,
+        size: tuple[float, float] = None,
+        team: Team = None,
+        quantize: bool = False,
     ) -> pygame.Surface:
-        return self.textures[id].resize(size, team)
+        return self.textures[id].resize(size, team, quantize)
 
     def get_surface(self, id, team: Team = None) -> pygame.Surface:
         return self.textures[id].get_surface(team)
@@ -39,6 +46,19 @@ class Textures:
     def get_original_surface(self, id, team: Team = None) -> pygame.Surface:
         return self.textures[id].get_original_surface(team)
 
+    def get_column(
+        self,
+        id,
+        ratio: float,
+        display_size: float,
+        width: float,
+        flipped: bool = False,
+        darkness: float = 0,
+    ) -> pygame.Surface:
+        return self.textures[id].get_column(
+            ratio, display_size, width, flipped, darkness
+        )
+
     def get_original_size(self, id) -> tuple[int, int]:
         return self.textures[id].get_original_size()
 
@@ -51,3 +71,6 @@ class Textures:
 
     def set_cache_limit(self, id, limit: int):
         self.textures[id].set_cache_limit(limit)
+
+    def get_cache_stats(self, id) -> tuple[int, int]:
+        return self.textures[id].get_cache_stats()
@@ -1,4 +1,4 @@
-from math import ceil, cos
+from math import cos, inf
 from time import time
 
 import pygame
@@ -15,45 +15,65 @@ from ...math.distance import distance_points
 from ...math.Point import Point
 from ...math.rotations import get_angle
 from ..AssetsLoader import TextureNames
+from ..NumpyWallRenderer import NumpyWallRenderer
 from ..resize import resize
 from ..Textures import Textures
 from .Component import Component
 
 textures = Textures()
 
+SKY_COLOR = (64, 64, 64)
+GROUND_COLOR = (42, 42, 42)
+
+WALLS_TEXTURES = {
+    WallType.WALL_1: TextureNames.BLUE,
+    WallType.WALL_2: TextureNames.RED,
+    WallType.WALL_3: TextureNames.GREEN,
+    WallType.WALL_4: TextureNames.BLUE,
+}
+
 
 class World(Component):
     """World component"""
 
     def __init__(
         self,
-        data={"rays": [], "entities": [], "current_entity": None},
+        data={"rays": [], "entities": {}, "current_entity": None, "positions": {}},
     ):
         super().__init__()
 
         self.set_original_size(1920, 1080)
 
-        self.update(data["rays"], data["entities"], data["current_entity"])
+        self.wall_renderer = NumpyWallRenderer()
+        # Distance of the wall of each ray when drawn by the wall renderer
+        self.walls_distances: list[float] | None = None
+
+        self.update(
+            data["rays"], data["entities"], data["current_entity"], data["positions"]
+        )
 
     def update(
         self,
         rays: list[tuple[int, Ray]],
-        entities: list[GameEntity],
+        entities: dict[int, GameEntity],
         current_entity: GameEntity = None,
+        positions: dict[int, Point] = {},
     ):
         """
         Update the component
 
         Parameters:
             rays (list): List of rays to render
-            entities (list): List of entities in the world
+            entities (dict): Entities in the world by uid
             current_entity (GameEntity): The current entity
+            positions (dict): Displayed positions of entities by uid (interpolated)
         """
 
         self.data = {
             "rays": rays,
             "entities": entities,
             "current_entity": current_entity,
+            "positions": positions,
         }
 
         super().update()
@@ -69,39 +89,145 @@ class World(Component):
 
         return 0.5 + angle_with_current_entity / VARIABLES.fov
 
-    def render(self):
-        self.surface.fill((42, 42, 42))
-        # Sky
-        pygame.draw.rect(
-            self.surface, (64, 64, 64), (0, 0, resize(1920, "x"), resize(540, "y")), 0
+    def get_wall(self, ray: Ray) -> tuple:
+        """Texture, ratio, display size, flipped and darkness of the wall hit"""
+        ray_world_size = 0
+        if ray.distance != 0:
+            if self.data["current_entity"] is not None:
+                # Fix fisheye effect
+                ray_world_size = VARIABLES.world_scale / (
+                    ray.distance
+                    * cos(
+                        degrees_to_radians(
+                            (self.data["current_entity"].rotation - ray.direction)
+                        )
+                    )
+                )
+            else:
+                ray_world_size = VARIABLES.world_scale / ray.distance
+
+        # Limit wall height
+        ray_world_size = min(ray_world_size, MAX_WALL_HEIGHT)
+
+        approximate_display_size = ray_world_size
+
+        ratio = ray.hit_infos["ratio"]
+        line_rotation = ray.hit_infos["wall_rotation"]
+
+        reversed_texture = False
+
+        if self.data["current_entity"] is not None:
+            rotation = self.data["current_entity"].rotation
+
+            rotation_difference = abs(line_rotation - rotation + 90)
+            if rotation_difference <= 90 or rotation_difference >= 270:
+                reversed_texture = True
+
+        texture_name = WALLS_TEXTURES.get(ray.hit_infos["wall_type"], TextureNames.BLUE)
+
+        return (
+            texture_name,
+            ratio,
+            approximate_display_size,
+            reversed_texture,
+            # Darkening effect
+            ray.distance * 20,
         )
 
+    def blit_in_front(
+        self, surface: pygame.Surface, position: tuple[float, float], distance: float
+    ):
+        """Blits the parts of the surface not hidden by the walls
+
+        Only needed when the walls are not in the render list (NumPy wall
+        renderer), otherwise the render list order hides the entities
+        """
+        if self.walls_distances is None:
+            self.surface.blit(surface, position)
+            return
+
+        x, y = position
+        width = surface.get_width()
+        ray_width = resize(VARIABLES.ray_width, "x")
+        first_ray = max(0, int(x // ray_width))
+        last_ray = min(len(self.walls_distances) - 1, int((x + width) // ray_width))
+
+        # Visible parts of the surface, adjacent rays merged
+        visible_start = None
+        for i in range(first_ray, last_ray + 2):
+            visible = i <= last_ray and self.walls_distances[i] > distance
+            if visible and visible_start is None:
+                visible_start = max(x, i * ray_width)
+            elif not visible and visible_start is not None:
+                visible_end = min(x + width, i * ray_width)
+                self.surface.blit(
+                    surface,
+                    (visible_start, y),
+                    (
+                        visible_start - x,
+                        0,
+                        visible_end - visible_start,
+                        surface.get_height(),
+                    ),
+                )
+                visible_start = None
+
+    def render(self):
         render_list = RenderList()
 
-        # List rays
-        if len(self.data["rays"]) > 0:
+        self.walls_distances = None
+        if VARIABLES.numpy_wall_renderer and self.wall_renderer.is_available():
+            # Walls drawn at once, entities are hidden by the walls distances
+            self.walls_distances = [inf] * VARIABLES.rays_quantity
+            walls = []
+            for i, ray in self.data["rays"]:
+                if ray.hit_point is not None and 0 <= i < VARIABLES.rays_quantity:
+                    self.walls_distances[i] = ray.distance
+                    walls.append((i, *self.get_wall(ray)))
+
+            self.wall_renderer.render(
+                self.surface,
+                {
+                    texture_name: textures.get_original_surface(texture_name)
+                    for texture_name in set(WALLS_TEXTURES.values())
+                },
+                walls,
+                VARIABLES.rays_quantity,
+                VARIABLES.ray_width,
+                SKY_COLOR,
+                GROUND_COLOR,
+            )
+        else:
+            self.surface.fill(GROUND_COLOR)
+            # Sky
+            pygame.draw.rect(
+                self.surface, SKY_COLOR, (0, 0, resize(1920, "x"), resize(540, "y")), 0
+            )
+
+            # List rays
             for i, ray in self.data["rays"]:
                 if ray.hit_point is not None:
-                    render_list.add(i * VARIABLES.ray_width, ray.distance, ray)
+                    render_list.add(
+                        i * VARIABLES.ray_width, ray.distance, ray, ray.hit_point
+                    )
 
         # List entities
-        for entity in self.data["entities"]:
+        for uid, entity in self.data["entities"].items():
             if self.data["current_entity"] is None:
                 break
 
-            distance = distance_points(
-                self.data["current_entity"].position, entity.position
-            )
+            position = self.data["positions"].get(uid, entity.position)
+            distance = distance_points(self.data["current_entity"].position, position)
 
             if distance > 0:
-                x_position = self.position_to_screen(entity.position)
+                x_position = self.position_to_screen(position)
                 margin = 5
                 if (
                     x_position is not None
                     and x_position * 100 > -margin
                     and x_position * 100 < 100 + margin
                 ):
-                    render_list.add(x_position, distance, entity)
+                    render_list.add(x_position, distance, entity, position)
 
         render_queue = render_list.get()
 
@@ -109,128 +235,26 @@ class World(Component):
             x_position = element["x_position"]
             distance = element["distance"]
             object = element["object"]
+            position = element["position"]
 
             if isinstance(object, Ray):
-                ray = object
-
-                ray_world_size = 0
-                if ray.distance != 0:
-                    if self.data["current_entity"] is not None:
-                        # Fix fisheye effect
-                        ray_world_size = VARIABLES.world_scale / (
-                            ray.distance
-                            * cos(
-                                degrees_to_radians(
-                                    (
-                                        self.data["current_entity"].rotation
-                                        - ray.direction
-                                    )
-                                )
-                            )
-                        )
-                    else:
-                        ray_world_size = VARIABLES.world_scale / ray.distance
-
-                # Limit wall height
-                ray_world_size = min(ray_world_size, MAX_WALL_HEIGHT)
-
-                approximate_display_size = ray_world_size
-
-                ratio = ray.hit_infos["line_intersecting"].get_point_ratio_on_line(
-                    ray.hit_infos["intersection_point"]
+                texture_name, ratio, display_size, reversed_texture, darkness = (
+                    self.get_wall(object)
                 )
-                line_rotation = ray.hit_infos["line_intersecting"].get_rotation()
-
-                reversed_texture = False
-
-                if self.data["current_entity"] is not None:
-                    rotation = self.data["current_entity"].rotation
-
-                    rotation_difference = abs(line_rotation - rotation + 90)
-                    if rotation_difference <= 90 or rotation_difference >= 270:
-                        reversed_texture = True
-
-                texture_name = TextureNames.BLUE
-                match ray.hit_infos["wall_type"]:
-                    case WallType.WALL_1:
-                        texture_name = TextureNames.BLUE
-                    case WallType.WALL_2:
-                        texture_name = TextureNames.RED
-                    case WallType.WALL_3:
-                        texture_name = TextureNames.GREEN
-                    case WallType.WALL_4:
-                        texture_name = TextureNames.BLUE
-                texture_surface_full = textures.get_original_surface(texture_name)
-
-                texture_size_ratio = (
-                    texture_surface_full.get_height() / approximate_display_size
-                )
-                resized_ray_width = ceil(VARIABLES.ray_width * texture_size_ratio)
-
-                # Crop surface to the center
-                height_cropping_offset = 0
-                if approximate_display_size > 1080:
-                    height_cropping_offset = int(
-                        resize(
-                            (approximate_display_size - 1080) / 2,
-                            "y",
-                        )
-                        * texture_size_ratio
-                    )
-
-                subsurface_start = texture_surface_full.get_width() * ratio
-                if (
-                    subsurface_start + resized_ray_width
-                    > texture_surface_full.get_width()
-                ):
-                    subsurface_start = max(
-                        0, texture_surface_full.get_width() - resized_ray_width
-                    )
-
-                texture_subsurface = texture_surface_full.subsurface(
-                    (
-                        subsurface_start,
-                        height_cropping_offset,
-                        min(
-                            resized_ray_width,
-                            texture_surface_full.get_width() - subsurface_start,
-                        ),
-                        texture_surface_full.get_height() - height_cropping_offset * 2,
-                    )
+                texture_column = textures.get_column(
+                    texture_name,
+                    ratio,
+                    display_size,
+                    VARIABLES.ray_width,
+                    reversed_texture,
+                    darkness,
                 )
 
-                texture_subsurface = pygame.transform.scale(
-                    texture_subsurface,
-                    (
-                        ceil(resize(VARIABLES.ray_width, "x")),
-                        resize(approximate_display_size, "y"),
-                    ),
-                )
-                if reversed_texture:
-                    texture_subsurface = pygame.transform.flip(
-                        texture_subsurface, True, False
-                    )
-
-                self.surface.blit(
-                    texture_subsurface,
-                    (
-                        resize(x_position, "x"),
-                        resize(540, "y") - texture_subsurface.get_height() / 2,
-                    ),
-                )
-
-                # Darkening effect
-                darkness_value = min(255, ray.distance * 20)
-                dark_mask = pygame.Surface(
-                    texture_subsurface.get_size(), pygame.SRCALPHA
-                )
-                dark_mask.fill((0, 0, 0, darkness_value))
-
                 self.surface.blit(
-                    dark_mask,
+                    texture_column,
                     (
                         resize(x_position, "x"),
-                        resize(540, "y") - dark_mask.get_height() / 2,
+                        resize(540, "y") - texture_column.get_height() / 2,
                     ),
                 )
 
@@ -238,9 +262,7 @@ class World(Component):
                 angle = 0
                 if self.data["current_entity"] is not None:
                     angle = (
-                        get_angle(
-                            object.position, center=self.data["current_entity"].position
-                        )
+                        get_angle(position, center=self.data["current_entity"].position)
                         - object.rotation
                         + 180
                         + 180 / ENTITIES_ROTATION_FRAMES
@@ -260,16 +282,18 @@ class World(Component):
                 )
 
                 # Display the entity
-                self.surface.blit(
+                self.blit_in_front(
                     textures.resize_texture(
                         texture,
                         (texture_new_size[0], texture_new_size[1]),
                         team=object.team,
+                        quantize=True,
                     ),
                     (
                         resize(x_position * 1920 - texture_new_size[0] / 2, "x"),
                         resize(540 + entity_world_size / 2 - texture_new_size[1], "y"),
                     ),
+                    distance,
                 )
 
                 # Display a text with the name
@@ -278,7 +302,7 @@ class World(Component):
                 text_surface = self.text.get_surface(
                     object.name, 125 / text_distance, get_team_color(object.team)
                 )
-                self.surface.blit(
+                self.blit_in_front(
                     text_surface,
                     (
                         resize(x_position * 1920, "x") - text_surface.get_width() / 2,
@@ -294,6 +318,7 @@ class World(Component):
                             - text_surface.get_height(),
                         ),
                     ),
+                    distance,
                 )
 
             elif isinstance(object, GameEntity) and not isinstance(object, LaserRay):
@@ -309,14 +334,17 @@ class World(Component):
                 )
 
                 # Display the entity
-                self.surface.blit(
+                self.blit_in_front(
                     textures.resize_texture(
-                        texture, (texture_new_size[0], texture_new_size[1])
+                        texture,
+                        (texture_new_size[0], texture_new_size[1]),
+                        quantize=True,
                     ),
                     (
                         resize(x_position * 1920 - texture_new_size[0] / 2, "x"),
                         resize(540 + entity_world_size / 2 - texture_new_size[1], "y"),
                     ),
+                    distance,
                 )
 
         super().render()
@@ -328,9 +356,20 @@ class RenderList:
     def __init__(self):
         self.list: list[dict[float, float, Ray | GameEntity]] = []
 
-    def add(self, x_position: float, distance: float, object: Ray | GameEntity):
+    def add(
+        self,
+        x_position: float,
+        distance: float,
+        object: Ray | GameEntity,
+        position: Point = None,
+    ):
         self.list.append(
-            {"x_position": x_position, "distance": distance, "object": object}
+            {
+                "x_position": x_position,
+                "distance": distance,
+                "object": object,
+                "position": position,
+            }
         )
 
     def sort(self):
@@ -205,10 +205,9 @@ class ModeTeamSelectionMenu(Component, Menu):
         self.player_areas = {}
         self.players = {}
         self.grab_player_id = None
-        for id, entity in self.game.world.entities.items():
-            if isinstance(entity, Player):
-                self.players[id] = entity
-                self.player_count += 1
+        for id, entity in self.game.world.entities.get_entities(Player).items():
+            self.players[id] = entity
+            self.player_count += 1
 
         player_width = self.menu_box_width / 4.5
         player_height = 60
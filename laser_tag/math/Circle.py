@@ -8,6 +8,8 @@ from .Point import Point
 class Circle:
     """A circle is represented by an origin point and a radius"""
 
+    __slots__ = ("origin", "radius")
+
     def __init__(self, origin: Point, radius: float):
         self.origin = origin
         self.radius = radius
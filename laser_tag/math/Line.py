@@ -10,15 +10,17 @@ from .Point import Point
 class Line:
     """A line is represented by two points in space"""
 
+    __slots__ = ("point1", "point2", "distance", "rotation")
+
+    rounding_precision = 10
+    margin = 10**-rounding_precision
+
     def __init__(self, point1: Point, point2: Point):
         self.point1 = point1
         self.point2 = point2
         self.distance = None
         self.rotation = None
 
-        rounding_precision = 10
-        self.margin = 10**-rounding_precision
-
     def __repr__(self):
         return f"[{self.point1},{self.point2}]"
 
@@ -6,6 +6,8 @@ from ..utils.float_to_int import float_to_int
 class Point:
     """A point is represented by x and y"""
 
+    __slots__ = ("x", "y")
+
     def __init__(self, x: float, y: float):
         self.x = x
         self.y = y
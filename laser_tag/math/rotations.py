@@ -15,3 +15,19 @@ def rotate(distance: float, angle: float, center=Point(0, 0)) -> Point:
     """Returns a point rotated around a center point by a given angle (degrees) and distance"""
     a = degrees_to_radians(angle)
     return Point(center.x + distance * cos(a), center.y + distance * sin(a))
+
+
+def get_rotation_vector(angle: float) -> tuple[float, float]:
+    """Returns the cosine and sine of an angle (degrees)"""
+    a = degrees_to_radians(angle)
+    return cos(a), sin(a)
+
+
+def rotate_vector(
+    vector: tuple[float, float], rotation_vector: tuple[float, float]
+) -> tuple[float, float]:
+    """Returns a vector rotated by a precomputed rotation vector (see get_rotation_vector)"""
+    return (
+        vector[0] * rotation_vector[0] - vector[1] * rotation_vector[1],
+        vector[1] * rotation_vector[0] + vector[0] * rotation_vector[1],
+    )
@@ -0,0 +1,35 @@
+import asyncio
+
+from ..configuration import NETWORK_MAX_MESSAGE_SIZE
+from .Connection import length_header_struct
+
+
+class AsyncConnection:
+    """Length-prefixed messages over an asyncio stream (see Connection)"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, data: bytes):
+        if len(data) > NETWORK_MAX_MESSAGE_SIZE:
+            raise ValueError(
+                f"Message too large {len(data)} > {NETWORK_MAX_MESSAGE_SIZE}"
+            )
+
+        self.writer.write(length_header_struct.pack(len(data)) + data)
+        await self.writer.drain()
+
+    async def recv(self) -> bytes:
+        """Waits for a complete message"""
+        try:
+            header = await self.reader.readexactly(length_header_struct.size)
+            (length,) = length_header_struct.unpack(header)
+            if length > NETWORK_MAX_MESSAGE_SIZE:
+                raise ConnectionError(f"Invalid message size {length}")
+            return await self.reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            raise ConnectionError("Connection closed")
+
+    def close(self):
+        self.writer.close()
@@ -0,0 +1,130 @@
+import asyncio
+from threading import Thread
+from time import time
+
+from laser_tag.configuration import SERVER_DEFAULT_TICK_RATE, SERVER_TIMEOUT
+from laser_tag.network.AsyncConnection import AsyncConnection
+from laser_tag.network.Server import ClientInstance, Server, main
+
+
+class AsyncServer(Server):
+    """Server handling every client and the simulation on one asyncio event loop
+
+    Clients coroutines only fill their events queue, the game is updated by the
+    tick task alone
+    """
+
+    def __init__(
+        self, port: int, debug=False, tick_rate: int = SERVER_DEFAULT_TICK_RATE
+    ):
+        super().__init__(port, debug, tick_rate)
+        if self.running is not None:
+            # Socket not bound
+            return
+
+        # The event loop runs in a single thread (replaces the clients threads)
+        self.running_thread = Thread(target=self.run)
+        self.tick_thread = None
+
+    def start_threads(self):
+        self.running_thread.start()
+
+    def run(self):
+        if self.debug and self.running:
+            print("SERVER started (asyncio)")
+        try:
+            asyncio.run(self.serve())
+        except Exception as e:
+            if self.debug:
+                print(f"SERVER {e}")
+        self.running = False
+
+    async def serve(self):
+        server = await asyncio.start_server(self.client, sock=self.socket)
+        await self.tick_loop()
+
+        server.close()
+        for client in list(self.clients.values()):
+            client.async_connection.close()
+        await server.wait_closed()
+
+    async def tick_loop(self):
+        self.next_tick = time()
+        while self.running:
+            self.tick()
+
+            # Lets the clients coroutines run even when late
+            await asyncio.sleep(max(0, self.get_next_tick_delay()))
+
+    async def client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        info = writer.get_extra_info("peername")
+        if self.max_clients is not None and len(self.clients) >= self.max_clients:
+            writer.close()
+            if self.debug:
+                print(
+                    f"SERVER {info} tried to connect but server is full ({len(self.clients)} client{'s' * (len(self.clients) > 1)})"
+                )
+            return
+
+        client = ClientInstance(info, writer.get_extra_info("socket"))
+        client.async_connection = AsyncConnection(reader, writer)
+        self.clients[info] = client
+
+        if self.debug:
+            print(
+                f"SERVER {client.info} connected ({len(self.clients)} client{'s' * (len(self.clients) > 1)})"
+            )
+
+        # Version check and protocol negotiation
+        reply, protocol = self.check_version(client, await self.recv(client))
+        await self.send(client, reply)
+
+        # Get player name
+        await self.send(client, self.set_player_name(client, await self.recv(client)))
+
+        client.protocol = protocol
+        self.spawn_player(client)
+
+        while client.data is not None and self.running:
+            client.data = self.parse_events(await self.recv(client))
+
+            if client.data is not None:
+                client.update_time_offset(client.data)
+                # Processed during the next tick
+                client.add_events(client.data)
+
+            # Send data
+            await self.send(client, self.get_state(client))
+
+        self.disconnect_client(client)
+        client.async_connection.close()
+
+    async def send(self, client: ClientInstance, data):
+        try:
+            await client.async_connection.send(self.encode_message(data))
+        except Exception as e:
+            if self.debug:
+                print(f"SERVER send {client.info} {e}")
+
+    async def recv(self, client: ClientInstance):
+        try:
+            data = await asyncio.wait_for(
+                client.async_connection.recv(), SERVER_TIMEOUT
+            )
+            return self.decode_message(client, data)
+        except Exception as e:
+            if self.debug:
+                print(f"SERVER recv {client.info} {e}")
+        return None
+
+    def stop(self):
+        if self.running:
+            if self.debug:
+                print("SERVER stopping...")
+
+            # The event loop stops at the next tick
+            self.running = False
+
+
+if __name__ == "__main__":
+    main(AsyncServer)
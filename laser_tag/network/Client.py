@@ -1,16 +1,27 @@
 import socket
+from collections import deque
 from threading import Lock, Thread
 from time import sleep
 
 from ..configuration import (
+    CLIENT_INPUTS_HISTORY,
     CLIENT_MINIMUM_TICK,
     CLIENT_TIMEOUT,
-    NETWORK_BUFFER_SIZE,
+    NETWORK_MAX_MESSAGE_SIZE,
     VARIABLES,
     VERSION,
 )
+from ..events.Event import Event
 from ..events.EventInstance import EventInstance
 from ..utils.Timer import Timer
+from .Connection import Connection
+from .protocol import (
+    PROTOCOL_BINARY,
+    PROTOCOL_TEXT,
+    PROTOCOL_VERSION,
+    decode_state,
+    encode_events,
+)
 from .safe_eval import safe_eval
 
 
@@ -22,8 +33,20 @@ class Client:
 
         self.connected = None
         self.thread = None
+        # Negotiated during the version check
+        self.protocol = PROTOCOL_TEXT
+        # Parsed entities of the snapshots received, baselines of the next deltas
+        self.snapshots: dict[int, dict[int, list]] = {}
+        self.acked_snapshot_id = 0
 
         self.events_to_send: list[EventInstance] = []
+        # Events of each frame by sequence number, until processed by the server
+        self.input_sequence = 0
+        self.inputs: deque[tuple[int, list[EventInstance]]] = deque(
+            maxlen=CLIENT_INPUTS_HISTORY
+        )
+        # Timestamp of the last TICK event processed by the server
+        self.processed_input_timestamp = None
         self.data_received = []
         self.mutex = Lock()
 
@@ -34,6 +57,7 @@ class Client:
 
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.socket.settimeout(CLIENT_TIMEOUT)
+        self.connection = Connection(self.socket)
         try:
             self.socket.connect((self.ip, self.port))
             self.connected = True
@@ -56,9 +80,13 @@ class Client:
             self.disconnect()
 
     def client(self):
-        # Version check
-        self.send(f'"{VERSION}"')
-        server_version = str(self.recv()[0])
+        # Version check and protocol negotiation
+        self.send(str([VERSION, PROTOCOL_VERSION]))
+        server_version = self.recv()[0]
+        protocol = PROTOCOL_TEXT
+        if isinstance(server_version, list) and len(server_version) == 2:
+            server_version, protocol = server_version
+        server_version = str(server_version)
         if VERSION != server_version:
             if self.debug:
                 print(
@@ -72,10 +100,18 @@ class Client:
         if VARIABLES.debug:
             print(f"CLIENT player name {player_name}")
 
+        if protocol == PROTOCOL_BINARY:
+            self.protocol = PROTOCOL_BINARY
+
         ping_timer = Timer()
         while self.connected:
             ping_timer.start()
-            bytes_sent = self.send(self.get_events_to_send())
+            events, input_sequence = self.get_events_to_send()
+            bytes_sent = self.send(
+                encode_events(events, self.acked_snapshot_id, input_sequence)
+                if self.protocol == PROTOCOL_BINARY
+                else events
+            )
             if VARIABLES.fps > 0:
                 sleep(1 / max(CLIENT_MINIMUM_TICK, VARIABLES.fps))
 
@@ -92,14 +128,14 @@ class Client:
         self.disconnect()
 
     def send(self, data):
-        encoded_data = str(data).encode("utf-8")
+        encoded_data = data if isinstance(data, bytes) else str(data).encode("utf-8")
         bytes_sent = len(encoded_data)
-        if bytes_sent > NETWORK_BUFFER_SIZE:
+        if bytes_sent > NETWORK_MAX_MESSAGE_SIZE:
             if self.debug:
-                print(f"CLIENT too much data {bytes_sent} > {NETWORK_BUFFER_SIZE}")
+                print(f"CLIENT too much data {bytes_sent} > {NETWORK_MAX_MESSAGE_SIZE}")
             return 0
         try:
-            self.socket.send(encoded_data)
+            self.connection.send(encoded_data)
         except Exception as e:
             if self.debug:
                 print(f"CLIENT send {e}")
@@ -107,26 +143,66 @@ class Client:
 
     def recv(self):
         try:
-            data = self.socket.recv(NETWORK_BUFFER_SIZE)
+            data = self.connection.recv()
             bytes_received = len(data)
-            data = safe_eval(data.decode("utf-8"), self.debug)
+            if self.protocol == PROTOCOL_BINARY:
+                data = decode_state(data, self.snapshots)
+                self.add_snapshot(
+                    data["snapshot_id"], data["baseline_id"], data["game"][1]
+                )
+            else:
+                data = safe_eval(data.decode("utf-8"), self.debug)
             return data, bytes_received
         except Exception as e:
             if self.debug:
                 print(f"CLIENT recv {e}")
         return None, 0
 
+    def add_snapshot(
+        self, snapshot_id: int, baseline_id: int, entities: dict[int, list]
+    ):
+        self.snapshots[snapshot_id] = entities
+        self.acked_snapshot_id = max(self.acked_snapshot_id, snapshot_id)
+
+        # Next baselines are snapshots acknowledged since this baseline
+        for id in list(self.snapshots.keys()):
+            if id < baseline_id:
+                del self.snapshots[id]
+
     def add_events_to_send(self, events: list[EventInstance]):
+        """Adds the events of a frame (one input)"""
         self.mutex.acquire()
         self.events_to_send += events
+        self.input_sequence += 1
+        self.inputs.append((self.input_sequence, events))
         self.mutex.release()
 
-    def get_events_to_send(self) -> list[EventInstance]:
+    def get_events_to_send(self) -> tuple[list[EventInstance], int]:
+        """Returns the events to send and the sequence number of the last input"""
         self.mutex.acquire()
         events = self.events_to_send.copy()
         self.events_to_send.clear()
+        input_sequence = self.input_sequence
+        self.mutex.release()
+        return events, input_sequence
+
+    def get_unprocessed_inputs(
+        self, input_sequence: int | None
+    ) -> tuple[list[list[EventInstance]], float | None]:
+        """Returns the inputs after the last one processed by the server and the
+        timestamp of the last TICK event processed (None if unknown)
+        """
+        if input_sequence is None:
+            return [], None
+
+        self.mutex.acquire()
+        while len(self.inputs) > 0 and self.inputs[0][0] <= input_sequence:
+            for event in self.inputs.popleft()[1]:
+                if event.id == Event.TICK:
+                    self.processed_input_timestamp = event.timestamp
+        inputs = [events for _, events in self.inputs]
         self.mutex.release()
-        return events
+        return inputs, self.processed_input_timestamp
 
     def add_received_data(self, data):
         self.mutex.acquire()
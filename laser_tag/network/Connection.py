@@ -0,0 +1,89 @@
+import socket
+from collections import deque
+from struct import Struct
+
+from ..configuration import (
+    NETWORK_BUFFER_SIZE,
+    NETWORK_MAX_MESSAGE_SIZE,
+    NETWORK_SEND_QUEUE_LIMIT,
+)
+
+length_header_struct = Struct("!I")
+
+
+class Connection:
+    """Length-prefixed messages over a TCP stream"""
+
+    def __init__(self, conn: socket.socket):
+        self.socket = conn
+
+        # Received bytes not yet returned as a message
+        self.buffer = bytearray()
+
+        # Framed messages waiting to be sent, the first one may be partially sent
+        self.send_queue: deque[bytes] = deque()
+        self.send_offset = 0
+
+    def send(self, data: bytes):
+        """Queues a message and sends as much of the queue as possible"""
+        if len(data) > NETWORK_MAX_MESSAGE_SIZE:
+            raise ValueError(
+                f"Message too large {len(data)} > {NETWORK_MAX_MESSAGE_SIZE}"
+            )
+
+        self.send_queue.append(length_header_struct.pack(len(data)) + data)
+
+        # Drop the oldest messages not started yet
+        while len(self.send_queue) > NETWORK_SEND_QUEUE_LIMIT:
+            if self.send_offset > 0:
+                del self.send_queue[1]
+            else:
+                self.send_queue.popleft()
+
+        self.flush()
+
+    def flush(self):
+        while len(self.send_queue) > 0:
+            message = self.send_queue[0]
+            try:
+                self.send_offset += self.socket.send(
+                    memoryview(message)[self.send_offset :]
+                )
+            except TimeoutError:
+                # Kept in the queue for the next send
+                return
+            if self.send_offset >= len(message):
+                self.send_queue.popleft()
+                self.send_offset = 0
+
+    def get_message(self) -> bytes | None:
+        """Returns the next complete message of the buffer"""
+        if len(self.buffer) < length_header_struct.size:
+            return None
+
+        (length,) = length_header_struct.unpack_from(self.buffer)
+        if length > NETWORK_MAX_MESSAGE_SIZE:
+            raise ConnectionError(f"Invalid message size {length}")
+
+        end = length_header_struct.size + length
+        if len(self.buffer) < end:
+            return None
+
+        message = bytes(self.buffer[length_header_struct.size : end])
+        del self.buffer[:end]
+        return message
+
+    def recv(self) -> bytes:
+        """Waits for a complete message"""
+        while True:
+            message = self.get_message()
+            if message is not None:
+                return message
+
+            data = self.socket.recv(NETWORK_BUFFER_SIZE)
+            if len(data) == 0:
+                raise ConnectionError("Connection closed")
+            self.buffer += data
+
+    def close(self):
+        self.socket.close()
@@ -0,0 +1,119 @@
+from ..configuration import (
+    SERVER_INTEREST_FAR_INTERVAL,
+    SERVER_INTEREST_LINE_OF_SIGHT,
+    SERVER_INTEREST_RADIUS,
+)
+from ..entities.LaserRay import LaserRay
+from ..entities.Player import Player
+from ..game.EntityGrid import EntityGrid
+from ..game.World import World
+from ..math.distance import distance_points
+from ..math.rotations import get_angle
+from .protocol import encode_scoreboard_entry
+
+
+class InterestManager:
+    """Entities sent to each client (area of interest)
+
+    Entities are relevant to a client in the interest radius of its player (and
+    in its line of sight if enabled), other entities are not sent. The other
+    players are only sent as scoreboard entries, every few snapshots
+    """
+
+    def __init__(
+        self,
+        radius: float = SERVER_INTEREST_RADIUS,
+        line_of_sight: bool = SERVER_INTEREST_LINE_OF_SIGHT,
+        scoreboard_interval: int = SERVER_INTEREST_FAR_INTERVAL,
+    ):
+        self.radius = radius
+        self.line_of_sight = line_of_sight
+        self.scoreboard_interval = scoreboard_interval
+
+        # Entities by cell of the radius size, updated once per snapshot
+        self.grid = EntityGrid(self.radius)
+        # Encoded scoreboard entries of the players of the snapshot
+        self.scoreboard: dict[int, bytes] = {}
+
+    def update(self, world: World, entities: dict[int, tuple]):
+        """Updates the grid and the scoreboard for the views of a snapshot
+
+        Parameters:
+            world (World): World of the snapshot
+            entities (dict): Encoded entities of the snapshot
+        """
+        self.grid.update(world.entities)
+
+        self.scoreboard = {
+            uid: encode_scoreboard_entry(entities[uid][1])
+            for uid in world.entities.get_entities(Player)
+            if uid in entities
+        }
+
+    def is_visible(self, world: World, uid: int, target_uid: int) -> bool:
+        entity = world.entities[uid]
+        target = world.entities[target_uid]
+        ray = world.map.cast_ray(
+            entity.position, get_angle(target.position, center=entity.position)
+        )
+        return (
+            ray.hit_point is None
+            or ray.distance
+            >= distance_points(entity.position, target.position)
+            - target.collider.radius
+        )
+
+    def get_relevant_entities(self, world: World, uid: int) -> set[int]:
+        """Entities uid relevant to the player"""
+        relevant = {uid}
+        entity = world.get_entity(uid)
+        if entity is None:
+            return relevant
+
+        # Only the cells around the player can be in the radius
+        for target_uid in self.grid.get_entities_in_area(
+            entity.position.x - self.radius,
+            entity.position.y - self.radius,
+            entity.position.x + self.radius,
+            entity.position.y + self.radius,
+        ):
+            target = world.entities.get(target_uid)
+            if target is None or target_uid == uid:
+                continue
+            if (
+                distance_points(entity.position, target.position)
+                > self.radius + target.collider.radius
+            ):
+                continue
+            if (
+                self.line_of_sight
+                and isinstance(target, Player)
+                and not self.is_visible(world, uid, target_uid)
+            ):
+                continue
+            relevant.add(target_uid)
+
+        # Laser rays crossing the radius from outside
+        for laser_uid, laser in world.entities.get_entities(LaserRay).items():
+            if (
+                laser.parent_id in relevant
+                or distance_points(entity.position, laser.end_position) <= self.radius
+            ):
+                relevant.add(laser_uid)
+
+        return relevant
+
+    def get_view(
+        self, world: World, uid: int, entities: dict[int, tuple]
+    ) -> dict[int, tuple]:
+        """Encoded entities of the snapshot sent to the player"""
+        view = {}
+        for relevant_uid in self.get_relevant_entities(world, uid):
+            encoded_entity = entities.get(relevant_uid)
+            if encoded_entity is not None:
+                view[relevant_uid] = encoded_entity
+        return view
+
+    def get_scoreboard(self, view: dict[int, tuple]) -> dict[int, bytes]:
+        """Scoreboard entries of the players out of the view"""
+        return {uid: entry for uid, entry in self.scoreboard.items() if uid not in view}
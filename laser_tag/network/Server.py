@@ -1,13 +1,16 @@
 import socket
 from sys import argv
 from sys import exit as sys_exit
-from threading import Thread
+from threading import Lock, Thread
+from time import sleep, time
 
 from laser_tag.configuration import (
+    CLIENT_TIME_OFFSET_SMOOTHING,
     MAX_PLAYER_NAME_LENGTH,
-    NETWORK_BUFFER_SIZE,
     SERVER_DEFAULT_MAX_CLIENTS,
+    SERVER_DEFAULT_TICK_RATE,
     SERVER_DELTA_TIME_NAME,
+    SERVER_SNAPSHOTS_HISTORY,
     SERVER_SOCKET_TIMEOUT,
     SERVER_TIMEOUT,
     VERSION,
@@ -17,7 +20,16 @@ from laser_tag.events.Event import Event
 from laser_tag.events.EventInstance import EventInstance
 from laser_tag.game.Game import Game
 from laser_tag.math.Point import Point
+from laser_tag.network.Connection import Connection
+from laser_tag.network.InterestManager import InterestManager
+from laser_tag.network.protocol import (
+    PROTOCOL_BINARY,
+    PROTOCOL_TEXT,
+    decode_events,
+    encode_state_header,
+)
 from laser_tag.network.safe_eval import safe_eval
+from laser_tag.network.Snapshot import Snapshot
 from laser_tag.utils.DeltaTime import DeltaTime
 
 
@@ -25,20 +37,90 @@ class ClientInstance:
     def __init__(self, info, conn):
         self.info = info
         self.conn = conn
+        self.connection = Connection(conn)
 
         self.thread = None
+        self.connected = True
+        # Negotiated during the version check
+        self.protocol = PROTOCOL_TEXT
+        # Last snapshot received by the client, baseline of its delta snapshots
+        self.acked_snapshot_id = 0
+        # Entities of the snapshots sent to the client by snapshot id (area of
+        # interest), baselines of its delta snapshots
+        self.views: dict[int, dict[int, tuple]] = {}
+        # Snapshot of the last scoreboard entries sent (players out of the views)
+        self.scoreboard_snapshot_id = None
 
         self.player_name = ""
 
         self.data = None
 
         self.controlled_entity_id = None
+        self.delta_time = None
+        # Server time of the last state sent, viewed by the client until the next one
+        self.state_timestamp = None
+        # Offset from the client events timestamps to the server time of the state
+        # the client was viewing (lag compensation)
+        self.time_offset = None
+
+        # Events received since the last tick
+        self.events: list[EventInstance] = []
+        self.events_mutex = Lock()
+        # Sequence number of the last input received, queued and processed
+        self.input_sequence = 0
+        self.events_input_sequence = 0
+        self.processed_input_sequence = 0
+
+    def add_events(self, events: list[EventInstance]):
+        with self.events_mutex:
+            self.events += events
+            self.events_input_sequence = self.input_sequence
+
+    def add_view(self, snapshot_id: int, view: dict[int, tuple]):
+        self.views[snapshot_id] = view
+        # Views older than the baseline are not used anymore
+        for id in list(self.views.keys()):
+            if (
+                id < self.acked_snapshot_id
+                or id <= snapshot_id - SERVER_SNAPSHOTS_HISTORY
+            ):
+                self.views.pop(id, None)
+
+    def update_time_offset(self, events: list[EventInstance]):
+        """Estimates the time offset from the events sent after the last state
+
+        Only for the binary protocol, text protocol clients are not rewound
+        """
+        if (
+            self.protocol != PROTOCOL_BINARY
+            or self.state_timestamp is None
+            or len(events) == 0
+        ):
+            return
+        # The client sends its events as soon as it receives a state
+        offset = self.state_timestamp - max(event.timestamp for event in events)
+        if self.time_offset is None:
+            self.time_offset = offset
+        else:
+            self.time_offset += (
+                offset - self.time_offset
+            ) * CLIENT_TIME_OFFSET_SMOOTHING
+
+    def get_events(self) -> list[EventInstance]:
+        with self.events_mutex:
+            events = self.events.copy()
+            self.events.clear()
+            self.processed_input_sequence = self.events_input_sequence
+        return events
 
 
 class Server:
-    def __init__(self, port: int, debug=False):
+    def __init__(
+        self, port: int, debug=False, tick_rate: int = SERVER_DEFAULT_TICK_RATE
+    ):
         self.port = port
         self.debug = debug
+        self.tick_rate = tick_rate
 
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.socket.settimeout(SERVER_SOCKET_TIMEOUT)
@@ -61,17 +143,28 @@ class Server:
         self.clients = {}
 
         self.game = Game(server_mode=True)
+        # Clients threads and the simulation thread share the game
+        self.game_mutex = Lock()
+        # Game state serialized once per tick and protocol, shared by all clients
+        self.snapshot_id = 0
+        self.snapshot: Snapshot | None = None
+        self.text_snapshot: bytes | None = None
+        # Recent snapshots, baselines of the clients deltas
+        self.snapshots_history: dict[int, Snapshot] = {}
+        # Entities sent to each client (None sends every entity)
+        self.interest_manager: InterestManager | None = InterestManager()
 
         self.server_delta_time = DeltaTime(SERVER_DELTA_TIME_NAME)
 
         self.running = None
 
         self.running_thread = Thread(target=self.run)
+        self.tick_thread = Thread(target=self.tick_loop)
 
     def start(self):
         if self.running is None:
             self.running = True
-            self.running_thread.start()
+            self.start_threads()
         elif not self.running:
             if self.debug:
                 print("SERVER was not started")
@@ -79,6 +172,10 @@ class Server:
             if self.debug:
                 print("SERVER has already been started")
 
+    def start_threads(self):
+        self.running_thread.start()
+        self.tick_thread.start()
+
     def run(self):
         if self.debug and self.running:
             print("SERVER started")
@@ -121,9 +218,41 @@ class Server:
 
         client.conn.settimeout(SERVER_TIMEOUT)
 
-        # Version check
-        client_version = str(self.recv(client))
-        self.send(client, f'"{VERSION}"')
+        # Version check and protocol negotiation
+        reply, protocol = self.check_version(client, self.recv(client))
+        self.send(client, reply)
+
+        # Get player name
+        self.send(client, self.set_player_name(client, self.recv(client)))
+
+        client.protocol = protocol
+        self.spawn_player(client)
+
+        while client.data is not None and self.running:
+            client.data = self.parse_events(self.recv(client))
+
+            if client.data is not None:
+                client.update_time_offset(client.data)
+                # Processed during the next tick
+                client.add_events(client.data)
+
+            # Send data
+            self.send(client, self.get_state(client))
+
+        self.disconnect_client(client)
+        client.conn.close()
+
+    def check_version(self, client: ClientInstance, client_version) -> tuple[str, int]:
+        """Returns the reply to the client version and the negotiated protocol"""
+        protocol = PROTOCOL_TEXT
+        if isinstance(client_version, list) and len(client_version) == 2:
+            client_version, client_protocol = client_version
+            if client_protocol == PROTOCOL_BINARY:
+                protocol = PROTOCOL_BINARY
+            reply = str([VERSION, protocol])
+        else:
+            reply = f'"{VERSION}"'
+        client_version = str(client_version)
         if VERSION != client_version:
             if self.debug:
                 print(
@@ -131,9 +260,11 @@ class Server:
                 )
         else:
             client.data = True
+        return reply, protocol
 
-        # Get player name
-        client.player_name = self.recv(client)
+    def set_player_name(self, client: ClientInstance, player_name) -> str:
+        """Returns the reply to the player name"""
+        client.player_name = player_name
         if not (
             client.player_name is not None
             and isinstance(client.player_name, str)
@@ -141,79 +272,235 @@ class Server:
         ):
             client.player_name = "Player"
         client.player_name = client.player_name[:MAX_PLAYER_NAME_LENGTH]
-        self.send(client, f'"{client.player_name}"')
-
-        # Create player
-        player = Player(Point(0, 0))
-        client.controlled_entity_id = self.game.world.spawn_entity(player)
-        spawn_point = self.game.world.map.get_spawn_point(client.controlled_entity_id)
-        player.move(spawn_point.x, spawn_point.y)
-        self.game.world.get_entity(client.controlled_entity_id).set_name(
-            client.player_name
-        )
+        return f'"{client.player_name}"'
+
+    def spawn_player(self, client: ClientInstance):
+        with self.game_mutex:
+            player = Player(Point(0, 0))
+            client.controlled_entity_id = self.game.world.spawn_entity(player)
+            spawn_point = self.game.world.map.get_spawn_point(
+                client.controlled_entity_id
+            )
+            player.move(spawn_point.x, spawn_point.y)
+            player.set_name(client.player_name)
+            client.delta_time = DeltaTime(client.info)
 
-        client_delta_time = DeltaTime(client.info)
+        client.add_events(
+            [EventInstance(Event.PLAYER_JOIN, client.controlled_entity_id)]
+        )
 
-        self.game.update(
-            [EventInstance(Event.PLAYER_JOIN, client.controlled_entity_id)],
-            controlled_entity_id=client.controlled_entity_id,
-            delta_time=self.server_delta_time,
-            player_delta_time=client_delta_time,
+    def disconnect_client(self, client: ClientInstance):
+        """The client is removed during the next tick"""
+        client.add_events(
+            [EventInstance(Event.PLAYER_LEAVE, client.controlled_entity_id)]
         )
+        client.connected = False
 
-        while client.data is not None and self.running:
-            client.data = self.parse_events(self.recv(client))
+    def tick_loop(self):
+        self.next_tick = time()
+        while self.running:
+            self.tick()
+
+            delay = self.get_next_tick_delay()
+            if delay > 0:
+                sleep(delay)
+
+    def get_next_tick_delay(self) -> float:
+        """Schedules the next tick and returns the time to wait for it"""
+        self.next_tick += 1 / self.tick_rate
+        delay = self.next_tick - time()
+        if delay <= 0:
+            # Late, skip the missed ticks
+            self.next_tick = time()
+        return delay
+
+    def tick(self):
+        """Steps the game once with the events received from every client"""
+        with self.game_mutex:
+            updated = False
+            for client in list(self.clients.values()):
+                if client.controlled_entity_id is None:
+                    continue
 
-            if client.data is not None:
-                # Process data
-                self.game.update(
-                    client.data,
-                    controlled_entity_id=client.controlled_entity_id,
-                    delta_time=self.server_delta_time,
-                    player_delta_time=client_delta_time,
-                )
+                events = client.get_events()
+                if len(events) > 0:
+                    updated = self.update_client(client, events) or updated
 
-            # Send data
-            self.send(client, self.get_state(client))
+                if not client.connected:
+                    del self.clients[client.info]
+                    self.game.world.remove_entity(client.controlled_entity_id)
 
-        # Disconnect client
-        self.game.update(
-            [EventInstance(Event.PLAYER_LEAVE, client.controlled_entity_id)],
-            controlled_entity_id=client.controlled_entity_id,
-            delta_time=self.server_delta_time,
-            player_delta_time=client_delta_time,
-        )
-        client.conn.close()
-        del self.clients[client.info]
-        self.game.world.remove_entity(client.controlled_entity_id)
+                    if self.debug:
+                        print(
+                            f"SERVER {client.info} disconnected ({len(self.clients)} client{'s' * (len(self.clients) > 1)})"
+                        )
 
-        if self.debug:
-            print(
-                f"SERVER {client.info} disconnected ({len(self.clients)} client{'s' * (len(self.clients) > 1)})"
+            if not updated:
+                self.game.update([], delta_time=self.server_delta_time)
+
+            self.game.world.record_positions(self.server_delta_time.current_time)
+
+            self.update_snapshot()
+
+    def update_client(
+        self, client: ClientInstance, events: list[EventInstance]
+    ) -> bool:
+        """Applies the events of the client, an error skips them without stopping
+        the tick
+        """
+        try:
+            self.game.update(
+                events,
+                controlled_entity_id=client.controlled_entity_id,
+                delta_time=self.server_delta_time,
+                player_delta_time=client.delta_time,
+                player_time_offset=client.time_offset,
             )
+        except Exception as e:
+            if self.debug:
+                print(f"SERVER update {client.info} {e}")
+            return False
+        return True
+
+    def update_snapshot(self):
+        # Only for the protocols used by the clients
+        protocols = {client.protocol for client in list(self.clients.values())}
+        self.snapshot = self.create_snapshot() if PROTOCOL_BINARY in protocols else None
+        self.text_snapshot = (
+            str(self.game).encode("utf-8") if PROTOCOL_TEXT in protocols else None
+        )
+
+    def create_snapshot(self) -> Snapshot:
+        self.snapshot_id += 1
+        snapshot = Snapshot(
+            self.snapshot_id, self.game, self.server_delta_time.current_time
+        )
+        # Inputs included in the snapshot, by client
+        snapshot.input_sequences = {
+            client.info: client.processed_input_sequence
+            for client in list(self.clients.values())
+        }
+        self.snapshots_history[snapshot.id] = snapshot
+        self.snapshots_history.pop(snapshot.id - SERVER_SNAPSHOTS_HISTORY, None)
+
+        if self.interest_manager is not None:
+            self.interest_manager.update(self.game.world, snapshot.entities)
+            for client in list(self.clients.values()):
+                if (
+                    client.protocol == PROTOCOL_BINARY
+                    and client.controlled_entity_id is not None
+                ):
+                    client.add_view(
+                        snapshot.id,
+                        self.interest_manager.get_view(
+                            self.game.world,
+                            client.controlled_entity_id,
+                            snapshot.entities,
+                        ),
+                    )
+        return snapshot
+
+    def get_snapshot(self) -> Snapshot:
+        snapshot = self.snapshot
+        if snapshot is None:
+            # First binary client since the last tick
+            with self.game_mutex:
+                if self.snapshot is None:
+                    self.snapshot = self.create_snapshot()
+                snapshot = self.snapshot
+        return snapshot
+
+    def get_text_snapshot(self) -> bytes:
+        text_snapshot = self.text_snapshot
+        if text_snapshot is None:
+            # First text client since the last tick
+            with self.game_mutex:
+                if self.text_snapshot is None:
+                    self.text_snapshot = str(self.game).encode("utf-8")
+                text_snapshot = self.text_snapshot
+        return text_snapshot
 
     def send(self, client: ClientInstance, data):
         try:
-            client.conn.send(str(data).encode("utf-8"))
+            client.connection.send(self.encode_message(data))
         except Exception as e:
             if self.debug:
                 print(f"SERVER send {client.info} {e}")
 
+    def encode_message(self, data) -> bytes:
+        return data if isinstance(data, bytes) else str(data).encode("utf-8")
+
     def recv(self, client: ClientInstance):
         try:
-            data = client.conn.recv(NETWORK_BUFFER_SIZE).decode("utf-8")
-            data = safe_eval(data, self.debug)
-            return data
+            return self.decode_message(client, client.connection.recv())
         except Exception as e:
             if self.debug:
                 print(f"SERVER recv {client.info} {e}")
         return None
 
+    def decode_message(self, client: ClientInstance, data: bytes):
+        if client.protocol == PROTOCOL_BINARY:
+            events, acked_snapshot_id, input_sequence = decode_events(data)
+            client.acked_snapshot_id = max(client.acked_snapshot_id, acked_snapshot_id)
+            client.input_sequence = max(client.input_sequence, input_sequence)
+            return events
+        return safe_eval(data.decode("utf-8"), self.debug)
+
     def set_max_clients(self, max_clients: int):
         self.max_clients = max_clients
 
-    def get_state(self, client: ClientInstance):
-        return {"game": self.game, "controlled_entity_id": client.controlled_entity_id}
+    def set_interest_manager(self, interest_manager: InterestManager | None):
+        self.interest_manager = interest_manager
+
+    def set_tick_rate(self, tick_rate: int):
+        self.tick_rate = tick_rate
+
+    def get_state(self, client: ClientInstance) -> bytes:
+        client.state_timestamp = self.server_delta_time.current_time
+        # Only the controlled entity and the baseline differ between clients
+        if client.protocol == PROTOCOL_BINARY:
+            # Full snapshot if the baseline is too old
+            snapshot = self.get_snapshot()
+            if self.interest_manager is None:
+                baseline = self.snapshots_history.get(client.acked_snapshot_id)
+                delta = snapshot.get_delta(baseline)
+            else:
+                view = client.views.get(snapshot.id)
+                if view is None:
+                    # Joined after the snapshot
+                    view = snapshot.entities
+                    client.add_view(snapshot.id, view)
+                scoreboard = None
+                if (
+                    client.scoreboard_snapshot_id is None
+                    or snapshot.id - client.scoreboard_snapshot_id
+                    >= self.interest_manager.scoreboard_interval
+                ):
+                    scoreboard = self.interest_manager.get_scoreboard(view)
+                    client.scoreboard_snapshot_id = snapshot.id
+                delta = snapshot.get_view_delta(
+                    view,
+                    client.acked_snapshot_id,
+                    client.views.get(client.acked_snapshot_id),
+                    scoreboard,
+                )
+            return (
+                encode_state_header(
+                    client.controlled_entity_id,
+                    snapshot.input_sequences.get(client.info, 0),
+                )
+                + delta
+            )
+
+        return b"".join(
+            (
+                b"{'game':",
+                self.get_text_snapshot(),
+                b",'controlled_entity_id':",
+                str(client.controlled_entity_id).encode("utf-8"),
+                b"}",
+            )
+        )
 
     def parse_events(self, data):
         if not isinstance(data, list):
@@ -243,7 +530,8 @@ class Server:
         return self.port
 
 
-if __name__ == "__main__":
+def main(server_type=Server):
+    """Runs a standalone server from the command line arguments"""
     port = None
     debug = None
     non_interactive = False
@@ -269,7 +557,7 @@ if __name__ == "__main__":
             print(f"Usage: {argv[0]} [port] [debug] [non-interactive]")
             sys_exit(1)
 
-    server = Server(port, debug)
+    server = server_type(port, debug)
     server.start()
 
     if not non_interactive:
@@ -287,3 +575,7 @@ if __name__ == "__main__":
 
     else:
         server.running_thread.join()
+
+
+if __name__ == "__main__":
+    main()
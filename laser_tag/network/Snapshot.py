@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from .protocol import (
+    encode_entities,
+    encode_game_mode,
+    encode_server_events,
+    encode_snapshot,
+)
+
+
+class Snapshot:
+    """Encoded game state of a server tick, baseline of the next deltas"""
+
+    def __init__(self, id: int, game, timestamp: float = 0):
+        self.id = id
+        # Server time of the tick
+        self.timestamp = timestamp
+
+        self.game_mode = encode_game_mode(game.game_mode)
+        # (type id, encoded fields) by entity uid
+        self.entities = encode_entities(game.world.entities)
+        self.server_events = encode_server_events(game.server_events)
+
+        # Encoded deltas by baseline id, shared by the clients at the same snapshot
+        self.deltas: dict[int, bytes] = {}
+        # Sequence number of the last input processed, by client
+        self.input_sequences: dict = {}
+
+    def get_delta(self, baseline: Snapshot | None) -> bytes:
+        """Returns the snapshot encoded against the baseline (full if None)"""
+        baseline_id = 0 if baseline is None else baseline.id
+        delta = self.deltas.get(baseline_id)
+        if delta is None:
+            delta = encode_snapshot(
+                self.id,
+                self.timestamp,
+                self.game_mode,
+                self.entities,
+                self.server_events,
+                baseline_id,
+                None if baseline is None else baseline.entities,
+            )
+            self.deltas[baseline_id] = delta
+        return delta
+
+    def get_view_delta(
+        self,
+        entities: dict[int, tuple],
+        baseline_id: int,
+        baseline_entities: dict[int, tuple] | None,
+        scoreboard: dict[int, bytes] | None = None,
+    ) -> bytes:
+        """Returns the entities sent to a client (area of interest) encoded
+        against its baseline view (full if None), with the scoreboard entries of
+        the other players if not None
+        """
+        return encode_snapshot(
+            self.id,
+            self.timestamp,
+            self.game_mode,
+            entities,
+            self.server_events,
+            baseline_id,
+            baseline_entities,
+            scoreboard,
+        )
@@ -0,0 +1,25 @@
+"""Dedicated server without display, serving the clients with asyncio
+
+python -m laser_tag.network.headless_server [port] [debug] [non-interactive]
+"""
+
+import sys
+
+# Any import of these modules fails in the headless server
+display_modules = ["pygame", "laser_tag.audio", "laser_tag.graphics"]
+
+
+def block_display_modules():
+    for module in display_modules:
+        if sys.modules.get(module) is not None:
+            raise RuntimeError(f"{module} is imported by the headless server")
+        sys.modules[module] = None
+
+
+if __name__ == "__main__":
+    block_display_modules()
+
+    from laser_tag.network.AsyncServer import AsyncServer
+    from laser_tag.network.Server import main
+
+    main(AsyncServer)
@@ -0,0 +1,512 @@
+"""Binary network protocol
+
+Every message starts with the protocol version and the message type. Entities
+are struct-packed records keyed by their type id (see create_entity), decoded
+to the same parsed objects as the text protocol (safe_eval of repr).
+
+States are delta snapshots: only the entities created, removed and the fields
+changed since the last snapshot acknowledged by the client are sent.
+
+Clients number their inputs, states carry the sequence number of the last input
+processed so the client can replay the next ones (client-side prediction).
+
+States may end with the scoreboard entries of the players out of the area of
+interest of the client (not sent as entities).
+"""
+
+from enum import Enum
+from struct import Struct
+
+from ..entities.create_entity import entity_types, get_entity_type_id
+from ..events.EventInstance import EventInstance
+
+# Protocols negotiated during the version handshake
+PROTOCOL_TEXT = 0
+# Revision of the binary message format
+PROTOCOL_BINARY = 5
+PROTOCOL_VERSION = PROTOCOL_BINARY
+
+MESSAGE_STATE = 1
+MESSAGE_EVENTS = 2
+
+# Entity fields, in the order of Entity.get_state() and Entity.create()
+# p: point, e: enum, u: entity uid (None is 0), s: string
+# Other codes are struct formats
+entity_fields = {
+    "Entity": "pff",
+    "GameEntity": "pffefIIfd??",
+    "Player": "pfefIIfddf??????s",
+    "LaserRay": "ppufeIfIf?",
+    "BarrelShort": "p",
+    "BarrelTall": "p",
+}
+
+# Fields of the Player sent in the scoreboard entries (team, score, eliminations,
+# deaths and name)
+scoreboard_fields = [2, 3, 4, 5, 16]
+
+# Value tags for event data
+TAG_NONE = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_FLOAT = 4
+TAG_STRING = 5
+TAG_LIST = 6
+
+header_struct = Struct("<BB")
+# Controlled entity uid and sequence number of the last input processed
+state_header_struct = Struct("<BBII")
+# Snapshot id, id of the snapshot the delta is based on (0: full snapshot) and
+# server time of the tick
+snapshot_header_struct = Struct("<IId")
+game_mode_struct = Struct("<B??ddd")
+count_struct = Struct("<I")
+entity_header_struct = Struct("<IB")
+# Entity uid and mask of the fields sent
+entity_delta_header_struct = Struct("<II")
+event_header_struct = Struct("<Hd")
+tag_struct = Struct("<B")
+int_struct = Struct("<q")
+float_struct = Struct("<d")
+string_length_struct = Struct("<H")
+bool_struct = Struct("<?")
+
+
+def compile_field(code: str) -> Struct | None:
+    match code:
+        case "p":
+            return Struct("<ff")
+        case "e":
+            return Struct("<b")
+        case "u":
+            return Struct("<I")
+        case "s":
+            return None
+    return Struct(f"<{code}")
+
+
+# Struct of each field (None for strings), by entity type id
+entity_structs = [
+    [compile_field(code) for code in entity_fields[entity_type.__name__]]
+    for entity_type in entity_types
+]
+entity_types_names = [entity_type.__name__ for entity_type in entity_types]
+# Entity types with only a position, by type id (see encode_entities)
+position_only_types = [entity_fields[name] == "p" for name in entity_types_names]
+player_type_id = entity_types_names.index("Player")
+
+
+class ProtocolError(Exception):
+    """Invalid or unsupported binary message"""
+
+
+def encode_string(value: str) -> bytes:
+    encoded_value = value.encode("utf-8")
+    return string_length_struct.pack(len(encoded_value)) + encoded_value
+
+
+def decode_string(data: bytes, offset: int) -> tuple[str, int]:
+    (length,) = string_length_struct.unpack_from(data, offset)
+    offset += string_length_struct.size
+    return data[offset : offset + length].decode("utf-8"), offset + length
+
+
+def encode_value(value) -> bytes:
+    """Encodes event data (None, bool, int, float, str or list)"""
+    if value is None:
+        return tag_struct.pack(TAG_NONE)
+    if isinstance(value, bool):
+        return tag_struct.pack(TAG_TRUE if value else TAG_FALSE)
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, int):
+        return tag_struct.pack(TAG_INT) + int_struct.pack(value)
+    if isinstance(value, float):
+        return tag_struct.pack(TAG_FLOAT) + float_struct.pack(value)
+    if isinstance(value, str):
+        return tag_struct.pack(TAG_STRING) + encode_string(value)
+    if isinstance(value, (list, tuple)):
+        return b"".join(
+            [tag_struct.pack(TAG_LIST), string_length_struct.pack(len(value))]
+            + [encode_value(element) for element in value]
+        )
+    raise ProtocolError(f"Cannot encode {type(value)}")
+
+
+def decode_value(data: bytes, offset: int) -> tuple[object, int]:
+    (tag,) = tag_struct.unpack_from(data, offset)
+    offset += tag_struct.size
+    if tag == TAG_NONE:
+        return None, offset
+    if tag == TAG_FALSE:
+        return False, offset
+    if tag == TAG_TRUE:
+        return True, offset
+    if tag == TAG_INT:
+        return int_struct.unpack_from(data, offset)[0], offset + int_struct.size
+    if tag == TAG_FLOAT:
+        return float_struct.unpack_from(data, offset)[0], offset + float_struct.size
+    if tag == TAG_STRING:
+        return decode_string(data, offset)
+    if tag == TAG_LIST:
+        (length,) = string_length_struct.unpack_from(data, offset)
+        offset += string_length_struct.size
+        values = []
+        for _ in range(length):
+            value, offset = decode_value(data, offset)
+            values.append(value)
+        return values, offset
+    raise ProtocolError(f"Unknown value tag {tag}")
+
+
+def encode_event(event: EventInstance) -> bytes:
+    return event_header_struct.pack(event.id.value, event.timestamp) + encode_value(
+        event.data
+    )
+
+
+def decode_event(data: bytes, offset: int) -> tuple[list, int]:
+    """Returns the parsed event (as EventInstance.create expects it)"""
+    event_id, timestamp = event_header_struct.unpack_from(data, offset)
+    event_data, offset = decode_value(data, offset + event_header_struct.size)
+    return [event_id, event_data, timestamp], offset
+
+
+def encode_entity_fields(entity) -> tuple[bytes, ...]:
+    """Returns each encoded field of the entity, compared field by field in deltas"""
+    fields = []
+    for code, field_struct, value in zip(
+        entity_fields[type(entity).__name__],
+        entity_structs[get_entity_type_id(entity)],
+        entity.get_state(),
+    ):
+        match code:
+            case "p":
+                fields.append(field_struct.pack(value.x, value.y))
+            case "e":
+                fields.append(
+                    field_struct.pack(
+                        value.value if isinstance(value, Enum) else int(value)
+                    )
+                )
+            case "u":
+                fields.append(field_struct.pack(0 if value is None else value))
+            case "s":
+                fields.append(encode_string(value))
+            case _:
+                fields.append(field_struct.pack(value))
+    return tuple(fields)
+
+
+def encode_entities(entities: dict) -> dict[int, tuple[int, tuple[bytes, ...]]]:
+    """Returns the type id and encoded fields of the entities by uid
+
+    Entities with only a position are encoded without their state
+    """
+    encoded_entities = {}
+    for uid, entity in entities.items():
+        type_id = get_entity_type_id(entity)
+        if position_only_types[type_id]:
+            position = entity.position
+            encoded_entities[uid] = (
+                type_id,
+                (entity_structs[type_id][0].pack(position.x, position.y),),
+            )
+        else:
+            encoded_entities[uid] = (type_id, encode_entity_fields(entity))
+    return encoded_entities
+
+
+def encode_entity(uid: int, type_id: int, fields: tuple[bytes, ...]) -> bytes:
+    return entity_header_struct.pack(uid, type_id) + b"".join(fields)
+
+
+def encode_entity_delta(
+    uid: int, fields: tuple[bytes, ...], baseline_fields: tuple[bytes, ...]
+) -> bytes | None:
+    """Encodes the fields changed since the baseline, None if nothing changed"""
+    mask = 0
+    changed_fields = []
+    for i, (field, baseline_field) in enumerate(zip(fields, baseline_fields)):
+        if field != baseline_field:
+            mask |= 1 << i
+            changed_fields.append(field)
+    if mask == 0:
+        return None
+    return entity_delta_header_struct.pack(uid, mask) + b"".join(changed_fields)
+
+
+def decode_field(code: str, field_struct: Struct | None, data: bytes, offset: int):
+    if code == "s":
+        return decode_string(data, offset)
+    values = field_struct.unpack_from(data, offset)
+    offset += field_struct.size
+    if code == "p":
+        return [values[0], values[1]], offset
+    if code == "u":
+        return None if values[0] == 0 else values[0], offset
+    return values[0], offset
+
+
+def decode_entity(data: bytes, offset: int) -> tuple[int, list, int]:
+    """Returns the parsed entity (as create_entity expects it)"""
+    uid, type_id = entity_header_struct.unpack_from(data, offset)
+    offset += entity_header_struct.size
+    if type_id >= len(entity_types):
+        raise ProtocolError(f"Unknown entity type {type_id}")
+
+    entity_type = entity_types[type_id]
+    parsed_object = [entity_type.__name__]
+    for code, field_struct in zip(
+        entity_fields[entity_type.__name__], entity_structs[type_id]
+    ):
+        value, offset = decode_field(code, field_struct, data, offset)
+        parsed_object.append(value)
+    return uid, parsed_object, offset
+
+
+def decode_entity_delta(
+    data: bytes, offset: int, baseline_entities: dict[int, list]
+) -> tuple[int, list, int]:
+    """Returns the parsed entity with the changed fields applied to its baseline"""
+    uid, mask = entity_delta_header_struct.unpack_from(data, offset)
+    offset += entity_delta_header_struct.size
+    if uid not in baseline_entities:
+        raise ProtocolError(f"Unknown entity {uid}")
+
+    parsed_object = baseline_entities[uid].copy()
+    type_id = entity_types_names.index(parsed_object[0])
+    for i, (code, field_struct) in enumerate(
+        zip(entity_fields[parsed_object[0]], entity_structs[type_id])
+    ):
+        if mask & (1 << i):
+            parsed_object[i + 1], offset = decode_field(
+                code, field_struct, data, offset
+            )
+    return uid, parsed_object, offset
+
+
+def encode_scoreboard_entry(fields: tuple[bytes, ...]) -> bytes:
+    """Encodes the scoreboard entry of a player from its encoded fields"""
+    return b"".join(fields[i] for i in scoreboard_fields)
+
+
+def encode_scoreboard(scoreboard: dict[int, bytes] | None) -> bytes:
+    """Encodes the scoreboard entries by player uid (None if not sent)"""
+    if scoreboard is None:
+        return bool_struct.pack(False)
+    return b"".join(
+        [bool_struct.pack(True), count_struct.pack(len(scoreboard))]
+        + [count_struct.pack(uid) + entry for uid, entry in scoreboard.items()]
+    )
+
+
+def decode_scoreboard(data: bytes, offset: int) -> tuple[dict[int, list] | None, int]:
+    """Returns the parsed scoreboard entries by player uid (None if not sent)"""
+    (sent,) = bool_struct.unpack_from(data, offset)
+    offset += bool_struct.size
+    if not sent:
+        return None, offset
+
+    (count,) = count_struct.unpack_from(data, offset)
+    offset += count_struct.size
+    scoreboard = {}
+    for _ in range(count):
+        (uid,) = count_struct.unpack_from(data, offset)
+        offset += count_struct.size
+        entry = []
+        for i in scoreboard_fields:
+            value, offset = decode_field(
+                entity_fields["Player"][i],
+                entity_structs[player_type_id][i],
+                data,
+                offset,
+            )
+            entry.append(value)
+        scoreboard[uid] = entry
+    return scoreboard, offset
+
+
+def encode_game_mode(game_mode) -> bytes:
+    return game_mode_struct.pack(
+        game_mode.game_mode.value,
+        game_mode.game_started,
+        game_mode.game_finished,
+        game_mode.grace_period_end,
+        game_mode.game_time_end,
+        game_mode.game_time_seconds,
+    )
+
+
+def encode_server_events(server_events) -> bytes:
+    events = server_events.get_events_to_send()
+    data = [count_struct.pack(len(events))]
+    for id, event in events.items():
+        data.append(count_struct.pack(id))
+        data.append(encode_event(event))
+    data.append(count_struct.pack(server_events.server_id))
+    return b"".join(data)
+
+
+def encode_snapshot(
+    snapshot_id: int,
+    timestamp: float,
+    game_mode: bytes,
+    entities: dict[int, tuple[int, tuple[bytes, ...]]],
+    server_events: bytes,
+    baseline_id: int = 0,
+    baseline_entities: dict[int, tuple[int, tuple[bytes, ...]]] | None = None,
+    scoreboard: dict[int, bytes] | None = None,
+) -> bytes:
+    """Encodes the entities created, changed and removed since the baseline
+
+    Entities are (type id, encoded fields) by uid, without baseline every
+    entity is created
+    """
+    if baseline_entities is None:
+        baseline_id = 0
+        baseline_entities = {}
+
+    created = []
+    changed = []
+    for uid, (type_id, fields) in entities.items():
+        baseline_entity = baseline_entities.get(uid)
+        if baseline_entity is None or baseline_entity[0] != type_id:
+            created.append(encode_entity(uid, type_id, fields))
+        else:
+            delta = encode_entity_delta(uid, fields, baseline_entity[1])
+            if delta is not None:
+                changed.append(delta)
+    removed = [
+        count_struct.pack(uid) for uid in baseline_entities if uid not in entities
+    ]
+
+    return b"".join(
+        [
+            snapshot_header_struct.pack(snapshot_id, baseline_id, timestamp),
+            game_mode,
+            count_struct.pack(len(created)),
+        ]
+        + created
+        + [count_struct.pack(len(changed))]
+        + changed
+        + [count_struct.pack(len(removed))]
+        + removed
+        + [server_events, encode_scoreboard(scoreboard)]
+    )
+
+
+def encode_state_header(controlled_entity_id: int, input_sequence: int = 0) -> bytes:
+    return state_header_struct.pack(
+        PROTOCOL_VERSION, MESSAGE_STATE, controlled_entity_id, input_sequence
+    )
+
+
+def decode_state(data: bytes, baselines: dict[int, dict[int, list]]) -> dict:
+    """Returns the parsed state (as Game.set_state expects it) and its snapshot ids
+
+    baselines are the parsed entities of the snapshots received, by id
+    """
+    version, message_type, controlled_entity_id, input_sequence = (
+        state_header_struct.unpack_from(data)
+    )
+    if version != PROTOCOL_VERSION or message_type != MESSAGE_STATE:
+        raise ProtocolError(f"Unexpected message {version} {message_type}")
+    offset = state_header_struct.size
+
+    snapshot_id, baseline_id, timestamp = snapshot_header_struct.unpack_from(
+        data, offset
+    )
+    offset += snapshot_header_struct.size
+    if baseline_id == 0:
+        baseline_entities = {}
+    elif baseline_id in baselines:
+        baseline_entities = baselines[baseline_id]
+    else:
+        raise ProtocolError(f"Unknown baseline snapshot {baseline_id}")
+
+    game_mode = list(game_mode_struct.unpack_from(data, offset))
+    offset += game_mode_struct.size
+
+    entities = baseline_entities.copy()
+    (created_count,) = count_struct.unpack_from(data, offset)
+    offset += count_struct.size
+    for _ in range(created_count):
+        uid, parsed_entity, offset = decode_entity(data, offset)
+        entities[uid] = parsed_entity
+
+    (changed_count,) = count_struct.unpack_from(data, offset)
+    offset += count_struct.size
+    for _ in range(changed_count):
+        uid, parsed_entity, offset = decode_entity_delta(
+            data, offset, baseline_entities
+        )
+        entities[uid] = parsed_entity
+
+    (removed_count,) = count_struct.unpack_from(data, offset)
+    offset += count_struct.size
+    for _ in range(removed_count):
+        (uid,) = count_struct.unpack_from(data, offset)
+        offset += count_struct.size
+        entities.pop(uid, None)
+
+    (events_count,) = count_struct.unpack_from(data, offset)
+    offset += count_struct.size
+    events = {}
+    for _ in range(events_count):
+        (id,) = count_struct.unpack_from(data, offset)
+        events[id], offset = decode_event(data, offset + count_struct.size)
+    (server_id,) = count_struct.unpack_from(data, offset)
+    offset += count_struct.size
+    scoreboard, offset = decode_scoreboard(data, offset)
+
+    return {
+        "game": [game_mode, entities, [events, server_id]],
+        "scoreboard": scoreboard,
+        "controlled_entity_id": controlled_entity_id,
+        "input_sequence": input_sequence,
+        "snapshot_id": snapshot_id,
+        "baseline_id": baseline_id,
+        "timestamp": timestamp,
+    }
+
+
+def encode_events(
+    events: list[EventInstance], acked_snapshot_id: int = 0, input_sequence: int = 0
+) -> bytes:
+    """Encodes the events, with the id of the last snapshot received and the
+    sequence number of the last input sent
+    """
+    return b"".join(
+        [
+            header_struct.pack(PROTOCOL_VERSION, MESSAGE_EVENTS),
+            count_struct.pack(acked_snapshot_id),
+            count_struct.pack(input_sequence),
+            count_struct.pack(len(events)),
+        ]
+        + [encode_event(event) for event in events]
+    )
+
+
+def decode_events(data: bytes) -> tuple[list[list], int, int]:
+    """Returns the parsed events (as EventInstance.create expects them), the id
+    of the last snapshot received by the client and the sequence number of its
+    last input
+    """
+    version, message_type = header_struct.unpack_from(data)
+    if version != PROTOCOL_VERSION or message_type != MESSAGE_EVENTS:
+        raise ProtocolError(f"Unexpected message {version} {message_type}")
+    offset = header_struct.size
+
+    (acked_snapshot_id,) = count_struct.unpack_from(data, offset)
+    offset += count_struct.size
+    (input_sequence,) = count_struct.unpack_from(data, offset)
+    offset += count_struct.size
+    (events_count,) = count_struct.unpack_from(data, offset)
+    offset += count_struct.size
+    events = []
+    for _ in range(events_count):
+        event, offset = decode_event(data, offset)
+        events.append(event)
+    return events, acked_snapshot_id, input_sequence
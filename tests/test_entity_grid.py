@@ -0,0 +1,60 @@
+import random
+from math import hypot
+
+import pytest
+
+from laser_tag.entities.Player import Player
+from laser_tag.game.EntityGrid import EntityGrid
+from laser_tag.math.Line import Line
+from laser_tag.math.Point import Point
+
+
+def get_distance_to_segment(point: Point, line: Line) -> float:
+    dx = line.point2.x - line.point1.x
+    dy = line.point2.y - line.point1.y
+    length = dx**2 + dy**2
+    ratio = (
+        0
+        if length == 0
+        else max(
+            0,
+            min(
+                1,
+                ((point.x - line.point1.x) * dx + (point.y - line.point1.y) * dy)
+                / length,
+            ),
+        )
+    )
+    return hypot(
+        point.x - line.point1.x - dx * ratio, point.y - line.point1.y - dy * ratio
+    )
+
+
+@pytest.mark.parametrize("cell_size", [1, 2.5])
+@pytest.mark.parametrize("margin", [0, 0.3, 2.25])
+def test_entities_near_line(cell_size, margin):
+    """Entities within margin of a line are found (collider included)"""
+    random.seed(3)
+    entities = {
+        uid: Player(Point(random.uniform(-20, 20), random.uniform(-20, 20)))
+        for uid in range(400)
+    }
+    grid = EntityGrid(cell_size)
+    grid.update(entities)
+
+    for _ in range(50):
+        line = Line(
+            Point(random.uniform(-20, 20), random.uniform(-20, 20)),
+            Point(random.uniform(-20, 20), random.uniform(-20, 20)),
+        )
+        uids = grid.get_entities_on_line(line, margin)
+
+        assert uids == sorted(uids)
+        for uid, entity in entities.items():
+            if (
+                get_distance_to_segment(entity.position, line)
+                <= margin + entity.collider.radius
+            ):
+                assert uid in uids
+        if margin > 0:
+            assert set(grid.get_entities_on_line(line)).issubset(uids)
@@ -0,0 +1,61 @@
+from laser_tag.entities.BarrelShort import BarrelShort
+from laser_tag.entities.BarrelTall import BarrelTall
+from laser_tag.entities.Entity import Entity
+from laser_tag.entities.GameEntity import GameEntity
+from laser_tag.entities.LaserRay import LaserRay
+from laser_tag.entities.Player import Player
+from laser_tag.game.EntityStore import EntityStore
+from laser_tag.math.Point import Point
+
+ENTITY_TYPES = [Entity, GameEntity, Player, LaserRay, BarrelShort, BarrelTall]
+
+
+def assert_types(entities: EntityStore):
+    """Typed views match an isinstance filtering of the entities"""
+    for entity_type in ENTITY_TYPES:
+        assert entities.get_entities(entity_type) == {
+            uid: entity
+            for uid, entity in entities.items()
+            if isinstance(entity, entity_type)
+        }
+
+
+def test_typed_views_follow_the_entities():
+    entities = EntityStore()
+    entities[1] = Player(Point(1, 2))
+    entities[2] = BarrelShort(Point(3, 4))
+    entities[3] = Player(Point(5, 6))
+    entities[4] = Entity(Point(7, 8), 0.5)
+    entities[5] = BarrelTall(Point(9, 10))
+    entities[6] = LaserRay(Point(1, 1), Point(2, 2), 1)
+    assert_types(entities)
+
+    del entities[1]
+    entities.pop(4)
+    entities.pop(4, None)
+    entities.popitem()
+    assert_types(entities)
+
+    # Replaced by an entity of another type
+    entities[2] = Player(Point(11, 12))
+    assert_types(entities)
+    entities[2] = Entity(Point(13, 14), 0.5)
+    assert_types(entities)
+
+    entities.update({7: Player(Point(15, 16)), 8: BarrelShort(Point(1, 1))})
+    entities.setdefault(9, BarrelTall(Point(2, 2)))
+    assert_types(entities)
+
+    entities.clear()
+    assert_types(entities)
+
+
+def test_typed_views_are_live():
+    entities = EntityStore({1: Player(Point(1, 2))})
+    players = entities.get_entities(Player)
+
+    entities[2] = Player(Point(3, 4))
+    del entities[1]
+
+    assert list(players.keys()) == [2]
+    assert entities.get_entities(LaserRay) == {}
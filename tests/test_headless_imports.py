@@ -0,0 +1,56 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from laser_tag.network.headless_server import display_modules
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Prints the display modules loaded after importing the servers
+IMPORT_SERVERS = """
+import sys
+{setup}
+from laser_tag.network.AsyncServer import AsyncServer
+from laser_tag.network.Server import Server, main
+print(",".join(
+    name
+    for name, module in sys.modules.items()
+    if module is not None
+    and any(name == prefix or name.startswith(prefix + ".") for prefix in {modules})
+))
+"""
+
+
+def get_imported_display_modules(setup: str) -> list[str]:
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            IMPORT_SERVERS.format(setup=setup, modules=display_modules),
+        ],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return [name for name in result.stdout.strip().split(",") if name != ""]
+
+
+@pytest.mark.parametrize(
+    "setup",
+    [
+        # Import of pygame fails, as without pygame installed
+        'sys.modules["pygame"] = None',
+        # Same as python -m laser_tag.network.headless_server
+        "from laser_tag.network.headless_server import block_display_modules\n"
+        "block_display_modules()",
+        # pygame available but never imported
+        "",
+    ],
+    ids=["without_pygame", "blocked", "with_pygame"],
+)
+def test_servers_do_not_import_display_modules(setup):
+    assert get_imported_display_modules(setup) == []
@@ -0,0 +1,72 @@
+import pytest
+
+from laser_tag.entities.Player import Player
+from laser_tag.game.Game import Game
+from laser_tag.game.Team import Team
+from laser_tag.math.Point import Point
+from laser_tag.network.InterestManager import InterestManager
+from laser_tag.network.protocol import decode_state, encode_state_header
+from laser_tag.network.Snapshot import Snapshot
+
+
+@pytest.fixture(autouse=True)
+def frozen_time(monkeypatch):
+    """The deactivation time ratio of the players depends on the current time"""
+    monkeypatch.setattr("laser_tag.entities.Player.time", lambda: 1000.0)
+
+
+def create_player(position: Point, name: str) -> Player:
+    player = Player(position)
+    player.set_name(name)
+    player.team = Team.BLUE
+    player.score = 300
+    player.eliminations = 3
+    player.deaths = 2
+    return player
+
+
+def test_players_out_of_interest_are_scoreboard_entries():
+    game = Game()
+    uid = game.world.spawn_entity(create_player(Point(2, 2), "Near 1"))
+    near_uid = game.world.spawn_entity(create_player(Point(3, 3), "Near 2"))
+    far_uid = game.world.spawn_entity(create_player(Point(40, 40), "Far"))
+    snapshot = Snapshot(1, game, 1)
+    interest_manager = InterestManager(radius=5)
+    interest_manager.update(game.world, snapshot.entities)
+
+    view = interest_manager.get_view(game.world, uid, snapshot.entities)
+    scoreboard = interest_manager.get_scoreboard(view)
+
+    assert uid in view and near_uid in view
+    assert far_uid not in view
+    assert scoreboard.keys() == {far_uid}
+
+    # Decoded by the client
+    state = decode_state(
+        encode_state_header(uid) + snapshot.get_view_delta(view, 0, None, scoreboard),
+        {},
+    )
+    assert far_uid not in state["game"][1]
+    assert state["scoreboard"] == {far_uid: [Team.BLUE.value, 300, 3, 2, "Far"]}
+
+    client_game = Game()
+    client_game.set_state(state)
+    client_game.game_mode.update_scoreboard(
+        client_game.world.entities, client_game.world.get_scoreboard_players()
+    )
+    assert far_uid not in client_game.world.entities
+    assert sorted(player.name for player in client_game.game_mode.scoreboard) == [
+        "Far",
+        "Near 1",
+        "Near 2",
+    ]
+
+    # Entry kept between the scoreboard snapshots, not duplicated once in view
+    state = decode_state(
+        encode_state_header(uid) + snapshot.get_view_delta(snapshot.entities, 0, None),
+        {},
+    )
+    assert state["scoreboard"] is None
+    client_game.set_state(state)
+    assert far_uid in client_game.world.scoreboard_players
+    assert client_game.world.get_scoreboard_players() == []
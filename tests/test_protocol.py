@@ -0,0 +1,292 @@
+from struct import Struct
+
+import pytest
+
+from laser_tag.entities.BarrelShort import BarrelShort
+from laser_tag.entities.BarrelTall import BarrelTall
+from laser_tag.entities.create_entity import (
+    create_entity,
+    entity_types,
+    get_entity_type_id,
+)
+from laser_tag.entities.Entity import Entity
+from laser_tag.entities.GameEntity import GameEntity
+from laser_tag.entities.LaserRay import LaserRay
+from laser_tag.entities.Player import Player
+from laser_tag.events.Event import Event
+from laser_tag.events.EventInstance import EventInstance
+from laser_tag.game.Game import Game
+from laser_tag.game.Team import Team
+from laser_tag.math.Point import Point
+from laser_tag.network.protocol import (
+    ProtocolError,
+    decode_entity,
+    decode_events,
+    decode_state,
+    encode_entities,
+    encode_entity,
+    encode_entity_fields,
+    encode_events,
+    encode_state_header,
+    entity_fields,
+)
+from laser_tag.network.safe_eval import safe_eval
+from laser_tag.network.Snapshot import Snapshot
+
+# Positions are sent as float32
+POSITION_TOLERANCE = 1e-6
+
+
+@pytest.fixture(autouse=True)
+def frozen_time(monkeypatch):
+    """The deactivation time ratio of the players depends on the current time"""
+    monkeypatch.setattr("laser_tag.entities.Player.time", lambda: 1000.0)
+
+
+def create_entities() -> dict[str, Entity]:
+    """One entity of each type, with values different from the defaults"""
+    player = Player(Point(10.123456789, -3.987654321))
+    player.rotation = 123.456
+    player.team = Team.RED
+    player.score = 1500
+    player.eliminations = 7
+    player.deaths = 3
+    player.hp = 2
+    player.name = "Player Ünïcode"
+    player.is_running = True
+    player.is_shooting = True
+    player.deactivated_until_timestamp = 1002.0
+
+    game_entity = GameEntity(Point(1.1, 2.2), 0.3)
+    game_entity.rotation = 45.5
+    game_entity.team = Team.BLUE
+    game_entity.score = 42
+    game_entity.can_move = False
+
+    laser_ray = LaserRay(Point(0.5, 0.25), Point(20.75, 30.125), 12)
+    laser_ray.rotation = 270
+    laser_ray.team = Team.GREEN
+    laser_ray.score = 100
+    laser_ray.eliminations = 1
+
+    entity = Entity(Point(-7.77, 8.88), 0.45)
+    entity.rotation = 90
+
+    entities = {
+        Entity.__name__: entity,
+        GameEntity.__name__: game_entity,
+        Player.__name__: player,
+        LaserRay.__name__: laser_ray,
+        BarrelShort.__name__: BarrelShort(Point(4.5, 5.5)),
+        BarrelTall.__name__: BarrelTall(Point(6.5, 7.5)),
+    }
+    assert entities.keys() == entity_fields.keys()
+    return entities
+
+
+def assert_parsed_equal(binary, text, tolerance=POSITION_TOLERANCE):
+    """Compares parsed objects, floats with a tolerance (float32 fields)"""
+    if isinstance(text, dict):
+        assert isinstance(binary, dict)
+        assert binary.keys() == text.keys()
+        for key in text:
+            assert_parsed_equal(binary[key], text[key], tolerance)
+    elif isinstance(text, list):
+        assert isinstance(binary, list)
+        assert len(binary) == len(text)
+        for binary_value, text_value in zip(binary, text):
+            assert_parsed_equal(binary_value, text_value, tolerance)
+    elif isinstance(text, float) or isinstance(binary, float):
+        assert binary == pytest.approx(text, rel=tolerance, abs=tolerance)
+    else:
+        assert binary == text
+
+
+def float32(value: float) -> float:
+    float32_struct = Struct("<f")
+    return float32_struct.unpack(float32_struct.pack(value))[0]
+
+
+def encode_game_state(snapshot: Snapshot, baseline: Snapshot | None = None) -> bytes:
+    return encode_state_header(1, 5) + snapshot.get_delta(baseline)
+
+
+def create_game() -> tuple[Game, dict[str, int]]:
+    game = Game()
+    uids = {
+        name: game.world.spawn_entity(entity)
+        for name, entity in create_entities().items()
+    }
+    return game, uids
+
+
+@pytest.mark.parametrize("entity_type", entity_types, ids=lambda t: t.__name__)
+def test_entity_round_trip(entity_type):
+    entity = create_entities()[entity_type.__name__]
+    data = encode_entity(17, get_entity_type_id(entity), encode_entity_fields(entity))
+
+    uid, parsed_object, offset = decode_entity(data, 0)
+
+    assert uid == 17
+    assert offset == len(data)
+    # Same parsed object as the text protocol
+    assert_parsed_equal(parsed_object, safe_eval(repr(entity)))
+    decoded_entity = create_entity(parsed_object)
+    assert type(decoded_entity) is entity_type
+    assert_parsed_equal(safe_eval(repr(decoded_entity)), safe_eval(repr(entity)))
+
+
+def test_entity_fields_cover_every_entity_type():
+    assert [entity_type.__name__ for entity_type in entity_types] == list(
+        entity_fields.keys()
+    )
+
+
+def test_position_float32_tolerance():
+    position = Point(123.456789012, -0.000123456789)
+    entity = BarrelShort(position)
+    data = encode_entity(1, get_entity_type_id(entity), encode_entity_fields(entity))
+
+    _, parsed_object, _ = decode_entity(data, 0)
+    x, y = parsed_object[1]
+
+    assert x == float32(position.x)
+    assert y == float32(position.y)
+    assert x == pytest.approx(position.x, rel=POSITION_TOLERANCE)
+    assert y == pytest.approx(position.y, rel=POSITION_TOLERANCE)
+    # Not exact: the text protocol sends the full precision
+    assert x != position.x
+
+
+def test_entities_encoding():
+    game, uids = create_game()
+    game.world.spawn_entity(BarrelShort(Point(-1.5, 123.456789)))
+    game.world.remove_entity(uids[BarrelTall.__name__])
+    game.world.get_entity(uids[BarrelShort.__name__]).move(8.25, 3.3)
+
+    assert encode_entities(game.world.entities) == {
+        uid: (get_entity_type_id(entity), encode_entity_fields(entity))
+        for uid, entity in game.world.entities.items()
+    }
+
+
+def test_unknown_entity_type():
+    data = encode_entity(1, len(entity_types), ())
+    with pytest.raises(ProtocolError):
+        decode_entity(data, 0)
+
+
+# Sent and received data (enums are sent as their values)
+EVENTS_DATA = [
+    (None, None),
+    (True, True),
+    (False, False),
+    (0, 0),
+    (-(2**40), -(2**40)),
+    (3.25, 3.25),
+    ("", ""),
+    ("text ü", "text ü"),
+    (Team.RED, Team.RED.value),
+    ([], []),
+    ((1, 2), [1, 2]),
+    (
+        [1, 2.5, "a", None, True, [Team.RED, [3]]],
+        [1, 2.5, "a", None, True, [Team.RED.value, [3]]],
+    ),
+]
+
+
+@pytest.mark.parametrize("event_id", list(Event), ids=lambda e: e.name)
+def test_event_round_trip(event_id):
+    events = []
+    for i, (data, _) in enumerate(EVENTS_DATA):
+        event = EventInstance(event_id, data)
+        event.timestamp = 1700000000.125 + i
+        events.append(event)
+
+    parsed_events, acked_snapshot_id, input_sequence = decode_events(
+        encode_events(events, 12, 34)
+    )
+
+    assert acked_snapshot_id == 12
+    assert input_sequence == 34
+    assert len(parsed_events) == len(events)
+    for event, parsed_event, (_, data) in zip(events, parsed_events, EVENTS_DATA):
+        created_event = EventInstance.create(parsed_event)
+        assert created_event.id == event.id
+        assert created_event.timestamp == event.timestamp
+        assert created_event.data == data
+        assert type(created_event.data) is type(data)
+
+
+def test_events_without_events():
+    assert decode_events(encode_events([])) == ([], 0, 0)
+
+
+def test_full_state_matches_text_protocol():
+    game, _ = create_game()
+    snapshot = Snapshot(1, game, 12.5)
+
+    state = decode_state(encode_game_state(snapshot), {})
+
+    assert state["snapshot_id"] == 1
+    assert state["baseline_id"] == 0
+    assert state["controlled_entity_id"] == 1
+    assert state["input_sequence"] == 5
+    assert state["timestamp"] == 12.5
+    assert state["scoreboard"] is None
+    text_state = safe_eval(str(game))
+    assert_parsed_equal(state["game"][0], text_state[0])
+    assert_parsed_equal(state["game"][1], text_state[1])
+    assert_parsed_equal(state["game"][2], text_state[2])
+
+
+def test_delta_state_equals_full_state():
+    game, uids = create_game()
+    baseline = Snapshot(1, game, 1)
+    baselines = {1: decode_state(encode_game_state(baseline), {})["game"][1]}
+
+    # Changed, removed and created entities
+    player = game.world.get_entity(uids[Player.__name__])
+    player.move(10.5, -4.25)
+    player.rotation += 10
+    player.hp -= 1
+    player.score += 100
+    player.name = "Renamed"
+    game.world.get_entity(uids[GameEntity.__name__]).team = Team.YELLOW
+    game.world.remove_entity(uids[BarrelTall.__name__])
+    game.world.remove_entity(uids[Entity.__name__])
+    game.world.spawn_entity(BarrelTall(Point(9.5, 9.5)))
+    # Same uid, different type
+    game.world.entities[uids[BarrelShort.__name__]] = Entity(Point(2, 3), 0.1)
+    snapshot = Snapshot(2, game, 2)
+
+    delta_data = encode_game_state(snapshot, baseline)
+    full_data = encode_game_state(snapshot)
+    delta_state = decode_state(delta_data, baselines)
+    full_state = decode_state(full_data, {})
+
+    assert delta_state["baseline_id"] == 1
+    assert len(delta_data) < len(full_data)
+    assert delta_state["game"] == full_state["game"]
+    assert_parsed_equal(delta_state["game"][1], safe_eval(str(game))[1])
+
+
+def test_unchanged_delta_state():
+    game, _ = create_game()
+    baseline = Snapshot(1, game, 1)
+    baselines = {1: decode_state(encode_game_state(baseline), {})["game"][1]}
+    snapshot = Snapshot(2, game, 2)
+
+    delta_state = decode_state(encode_game_state(snapshot, baseline), baselines)
+
+    assert delta_state["game"][1] == baselines[1]
+
+
+def test_unknown_baseline():
+    game, _ = create_game()
+    baseline = Snapshot(1, game, 1)
+    snapshot = Snapshot(2, game, 2)
+
+    with pytest.raises(ProtocolError):
+        decode_state(encode_game_state(snapshot, baseline), {})
@@ -0,0 +1,64 @@
+import socket
+
+import pytest
+
+from laser_tag.entities.Player import Player
+from laser_tag.events.Event import Event
+from laser_tag.events.EventInstance import EventInstance
+from laser_tag.game.Game import Game
+from laser_tag.network.protocol import PROTOCOL_BINARY
+from laser_tag.network.Server import ClientInstance, Server
+
+
+@pytest.fixture
+def server():
+    server = Server(0)
+    yield server
+    server.socket.close()
+
+
+def add_client(server: Server, name: str) -> ClientInstance:
+    client = ClientInstance(("localhost", len(server.clients)), socket.socket())
+    client.protocol = PROTOCOL_BINARY
+    client.player_name = name
+    server.clients[client.info] = client
+    server.spawn_player(client)
+    return client
+
+
+def test_client_update_error_does_not_stop_the_tick(server, monkeypatch):
+    bad_client = add_client(server, "Bad")
+    client = add_client(server, "Good")
+    updated_entities = []
+    update = Game.update
+
+    def failing_update(game, events, controlled_entity_id=None, **kwargs):
+        if controlled_entity_id == bad_client.controlled_entity_id:
+            raise ValueError("bad events")
+        updated_entities.append(controlled_entity_id)
+        update(game, events, controlled_entity_id, **kwargs)
+
+    monkeypatch.setattr(Game, "update", failing_update)
+
+    server.tick()
+    bad_client.add_events([EventInstance(Event.GAME_SHOOT)])
+    client.add_events([EventInstance(Event.GAME_SHOOT)])
+    server.tick()
+
+    assert updated_entities == [client.controlled_entity_id] * 2
+    assert not server.game_mutex.locked()
+    assert server.snapshot.id == 2
+    assert isinstance(server.game.world.get_entity(client.controlled_entity_id), Player)
+
+
+def test_mutex_released_after_an_error(server, monkeypatch):
+    add_client(server, "Player")
+
+    def failing_snapshot():
+        raise ValueError("snapshot")
+
+    monkeypatch.setattr(server, "update_snapshot", failing_snapshot)
+
+    with pytest.raises(ValueError):
+        server.tick()
+    assert not server.game_mutex.locked()
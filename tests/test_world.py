@@ -0,0 +1,43 @@
+from laser_tag.entities.Player import Player
+from laser_tag.events.Event import Event
+from laser_tag.events.EventInstance import EventInstance
+from laser_tag.game.World import World
+from laser_tag.utils.DeltaTime import DeltaTime
+
+
+def create_frame(timestamp: float, running: bool) -> list[EventInstance]:
+    events = [EventInstance(Event.TICK)]
+    if running:
+        events.append(EventInstance(Event.GAME_RUN))
+    events.append(EventInstance(Event.GAME_MOVE, 0))
+    for event in events:
+        event.timestamp = timestamp
+    return events
+
+
+def move_player(batches: list[list[EventInstance]]) -> Player:
+    world = World()
+    uid = world.spawn_entity(Player(world.map.get_spawn_point(1)))
+    player_delta_time = DeltaTime("test_world")
+    player_delta_time.reset(0)
+    for events in batches:
+        world.update_controlled_entity(uid, events, player_delta_time=player_delta_time)
+    return world.get_entity(uid)
+
+
+def test_movement_state_of_each_tick():
+    """Frames received together move the player like frames received one by one"""
+    frames = [
+        create_frame(1 / 60, True),
+        create_frame(2 / 60, False),
+        create_frame(3 / 60, True),
+        create_frame(4 / 60, False),
+    ]
+
+    separately = move_player(frames)
+    together = move_player([[event for frame in frames for event in frame]])
+
+    assert together.position.x == separately.position.x
+    assert together.position.y == separately.position.y
+    assert together.is_moving
+    assert not together.is_running